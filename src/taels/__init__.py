@@ -1 +1,19 @@
-from .app import Taels
+from importlib import import_module
+
+
+__all__ = ['Taels']
+
+
+def __getattr__(name):
+    # The application pulls the server stack in: it is imported lazily,
+    # as are the submodules.
+    if name == 'Taels':
+        from .app import Taels
+        return Taels
+    try:
+        return import_module('.' + name, __name__)
+    except ModuleNotFoundError as exc:
+        if exc.name != '%s.%s' % (__name__, name):
+            raise
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name))
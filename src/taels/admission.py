@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Admission control and load shedding.
+
+Requests are admitted before any traversal, within a global concurrency
+limit and optional per-route budgets. Requests exceeding a limit wait in
+a bounded queue; they are shed with a 503 response when the queue is
+full or when they waited longer than the deadline.
+"""
+
+import asyncio
+
+from collections import deque
+from taels_server.http.response import HTTPResponse
+
+
+class Limiter:
+    """Concurrency limit with a bounded waiting queue. A `queue` of None
+    means the queue is unbounded.
+    """
+
+    def __init__(self, limit, queue=None):
+        self.limit = limit
+        self.queue = queue
+        self.in_flight = 0
+        self.waiters = deque()
+
+    async def acquire(self, timeout=None):
+        """Returns True once a slot is acquired, or False if the queue
+        is full or if no slot was freed within `timeout` seconds.
+        """
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            return True
+        if self.queue is not None and len(self.waiters) >= self.queue:
+            return False
+
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+
+        def expire():
+            if not waiter.done():
+                waiter.set_result(False)
+
+        self.waiters.append(waiter)
+        handle = timeout is not None and loop.call_later(timeout, expire)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if (waiter.done() and not waiter.cancelled() and
+                    waiter.result()):
+                # The slot was handed over just before the cancellation.
+                self.release()
+            raise
+        finally:
+            if handle:
+                handle.cancel()
+            try:
+                self.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                # The slot is handed over to the first waiter.
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def stats(self):
+        return {'in_flight': self.in_flight, 'waiting': len(self.waiters)}
+
+
+def view_route(request):
+    """Route function keying the requests on the view name of their
+    path, for paths explicitly ending on a view (`@@name`).
+    """
+    name = request.path.rstrip('/').rsplit('/', 1)[-1]
+    if name.startswith('@@'):
+        return name[2:]
+    return None
+
+
+class AdmissionControl:
+    """Admits the requests within `limit` concurrent requests, with at
+    most `queue` waiting requests, each waiting up to `deadline` seconds.
+
+    `route` is an optional callable returning the route key of a request
+    (e.g. a view name or a path prefix), or None. `budgets` maps the
+    route keys to their own `limit` or (`limit`, `queue`) pair.
+    """
+
+    def __init__(self, limit=100, queue=100, deadline=1., retry_after=1,
+                 route=None, budgets=None):
+        self.limiter = Limiter(limit, queue)
+        self.deadline = deadline
+        self.retry_after = retry_after
+        self.route = route
+        self.budgets = {}
+        for key, budget in (budgets or {}).items():
+            if isinstance(budget, int):
+                budget = (budget, queue)
+            self.budgets[key] = Limiter(*budget)
+        self.admitted = 0
+        self.shed = 0
+
+    async def admit(self, request):
+        """Returns the acquired limiters, to be released once the request
+        is handled, or None if the request is shed.
+        """
+        limiters = [self.limiter]
+        if self.route is not None:
+            budget = self.budgets.get(self.route(request))
+            if budget is not None:
+                limiters.insert(0, budget)
+
+        loop = asyncio.get_event_loop()
+        expires = loop.time() + self.deadline
+        acquired = []
+        for limiter in limiters:
+            if not await limiter.acquire(max(0, expires - loop.time())):
+                self.release(acquired)
+                self.shed += 1
+                return None
+            acquired.append(limiter)
+        self.admitted += 1
+        return acquired
+
+    def release(self, acquired):
+        for limiter in acquired:
+            limiter.release()
+
+    def unavailable(self):
+        return HTTPResponse(
+            'Service Unavailable', status=503,
+            headers={'Retry-After': str(self.retry_after)})
+
+    def stats(self):
+        return {
+            'in_flight': self.limiter.in_flight,
+            'waiting': len(self.limiter.waiters),
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'routes': {
+                key: limiter.stats() for key, limiter in self.budgets.items()},
+        }
@@ -13,10 +13,18 @@ from taels_server.config import Config as BASE_CONFIG
 from taels_server.protocols.http import HttpProtocol
 from taels_server.http.response import text, HTTPResponse, StreamingHTTPResponse
 from taels_server.http.handlers import ErrorHandler
-from taels_server.http.request import Request
 from taels_server.http.exceptions import HTTPException, ServerError
 from taels_server.log import logger, error_logger, LOGGING_CONFIG_DEFAULTS
 
+from .body import BodyStream
+from .deadline import Deadline
+from .instrumentation import Instrumentation, exposition_middleware
+from .prefork import Prefork
+from .request import Request
+from .resources import Resources, RequestResources
+from .routes import RouteTable
+from .utils import is_coroutine
+
 
 def server_configuration(
         app, listeners=None, host=None, port=None, ssl=None, sock=None,
@@ -93,7 +101,7 @@ def server_configuration(
     return server_settings
 
 
-Handler = namedtuple('handler', ['callable', 'order', 'type'])
+Handler = namedtuple('handler', ['callable', 'order', 'type', 'coroutine'])
 
 
 class HandlersRegistry:
@@ -101,25 +109,39 @@ class HandlersRegistry:
     def __init__(self):
         self.middlewares = {}
         self.listeners = {}
-    
+        self._chains = {}
+
     def add_handler(self, collection, type, callable, order=None):
-        handler = Handler(callable=callable, order=order, type=type)
+        handler = Handler(
+            callable=callable, order=order, type=type,
+            coroutine=is_coroutine(callable))
         handlers = collection.setdefault(type, [])
         if not handler in handlers:
             handlers.append(handler)
+            # The compiled chain is stale: it will be rebuilt on next use.
+            self._chains.pop((id(collection), type), None)
             return True
         return False
 
-    def get_handlers(self, collection, type, reverse=False):
-        def getKey(handler):
-            return handler.order
-        handlers = collection.get(type, None)
-        if handlers is None:
-            return []
+    def compile_handlers(self, collection, type):
+        """Returns the (forward, reverse) tuples of handlers for the
+        given type, sorted by order. The result is cached until a new
+        handler of that type is added.
+        """
+        key = (id(collection), type)
+        chain = self._chains.get(key)
+        if chain is None:
+            def getKey(handler):
+                return handler.order or 0
+            forward = tuple(sorted(collection.get(type, ()), key=getKey))
+            chain = self._chains[key] = (forward, forward[::-1])
+        return chain
 
+    def get_handlers(self, collection, type, reverse=False):
+        forward, backward = self.compile_handlers(collection, type)
         if not reverse:
-            return sorted(handlers, key=getKey)
-        return reversed(sorted(handlers, key=getKey))
+            return forward
+        return backward
 
     def add_listener(self, event, handler, order=None):
         self.add_handler(self.listeners, event, handler, order)
@@ -156,15 +178,16 @@ class HandlersRegistry:
     async def run_middlewares(self, type, *args, **kwargs):
         default = kwargs.pop('default', None)
         reverse = kwargs.pop('reverse', None)
-        middlewares = self.get_middlewares(type, reverse=reverse)
-        if middlewares:
-            for middleware in middlewares:
-                response = middleware(*args, **kwargs)
-                if isawaitable(response):
-                    response = await response
-                if response:
-                    # If there's any response, we break the loop and return.
-                    return response
+        middlewares = self.get_handlers(
+            self.middlewares, type, reverse=reverse)
+        for middleware in middlewares:
+            response = middleware.callable(*args, **kwargs)
+            # Wrappers of coroutine functions are not detected as such.
+            if middleware.coroutine or isawaitable(response):
+                response = await response
+            if response:
+                # If there's any response, we break the loop and return.
+                return response
         return default
 
 
@@ -173,16 +196,106 @@ class Taels(HandlersRegistry):
     def __init__(
             self, name,
             websocket_enabled=False, request_class=Request,
-            error_handler=None, config=None):
+            error_handler=None, config=None, offloader=None,
+            admission=None, request_stream=False):
         super().__init__()
         self.__name__ = name
-        self.is_request_stream = False
+        # Path prefixes of the requests whose body is streamed.
+        if request_stream is True:
+            request_stream = ('/',)
+        self.stream_paths = tuple(request_stream or ())
+        self.is_request_stream = bool(self.stream_paths)
         self.error_handler = error_handler or ErrorHandler()
         self.config = config or BASE_CONFIG()
         self.websocket_enabled = websocket_enabled
         self.request_class = request_class
+        self.instrumentation = None
+        self.offloader = offloader
+        self.admission = admission
+        self.routes = None
+        self.static_directories = {}
+        self.resources = Resources()
+        self.add_listener('before_server_start', self.resources.start)
+        self.add_listener('after_server_stop', self.resources.stop)
+        if offloader is not None:
+            self.add_listener(
+                'after_server_stop',
+                lambda app, loop: app.offloader.shutdown(wait=False))
+
+    def instrument(self, *sinks, metrics_path=None, metrics_sink=None):
+        """Enables the timing of the request handling stages, recorded
+        into the given sinks. If `metrics_path` is given, the Prometheus
+        exposition of `metrics_sink` (a `HistogramSink`) is served on it.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation()
+        for sink in sinks:
+            self.instrumentation.add_sink(sink)
+        if metrics_path is not None:
+            if metrics_sink is None:
+                raise ValueError("A sink is required to expose metrics.")
+            self.add_middleware(
+                'request', exposition_middleware(metrics_sink, metrics_path),
+                order=-1)
+        return self.instrumentation
+
+    def route(self, path):
+        """Route decorator: the handler answers the requests on `path`
+        directly, without traversal.
+        """
+        if self.routes is None:
+            self.routes = RouteTable()
+        return self.routes.route(path)
+
+    def static(self, name, directory):
+        """Publishes the files of `directory` in the `++static++name`
+        namespace. See `taels.static`.
+        """
+        self.static_directories[name] = os.path.abspath(directory)
+
+    def resource(self, name, close=None, size=10):
+        """Resource provider decorator. The decorated callable creates a
+        resource, pooled per application and acquired per request with
+        `await request.resources.get(name)`.
+        """
+        def register_resource(create):
+            self.resources.provide(name, create, close=close, size=size)
+            return create
+        return register_resource
 
     async def request_handler(self, request, write_callback, stream_callback):
+        """Admits the request and handles it, then releases the resources
+        it acquired, if any.
+        """
+        try:
+            request.deadline = Deadline(self.config.get('REQUEST_DEADLINE'))
+        except AttributeError:
+            # The request class has no `deadline` slot.
+            pass
+        admitted = None
+        if self.admission is not None:
+            admitted = await self.admission.admit(request)
+            if admitted is None:
+                # Shed before any work is done.
+                write_callback(self.admission.unavailable())
+                return
+
+        if self.resources.providers:
+            request.resources = RequestResources(self.resources)
+        try:
+            await self.handle_request(
+                request, write_callback, stream_callback)
+        except BaseException:
+            if getattr(request, 'resources', None) is not None:
+                request.resources.failed = True
+            raise
+        finally:
+            if admitted is not None:
+                self.admission.release(admitted)
+            if getattr(request, 'resources', None) is not None:
+                await request.resources.release()
+
+    async def handle_request(self, request, write_callback, stream_callback):
         """Take a request from the HTTP Server and return a response object
         to be sent back The HTTP Server only expects a response object, so
         exception handling must be done here
@@ -195,12 +308,30 @@ class Taels(HandlersRegistry):
         """
         try:
             request.app = self
-            response = await self.run_middlewares('request', request)
+            response = None
+            if (getattr(request, 'stream', None) is not None and
+                    not request.path.startswith(self.stream_paths)):
+                # Only the publisher views can consume a streamed body.
+                request.body = await BodyStream(request).read()
+                request.stream = None
+            if self.routes is not None:
+                # Fixed endpoints skip the middlewares and the traversal.
+                response = await self.routes.dispatch(request)
+            if response is None:
+                if self.instrumentation is None:
+                    response = await self.run_middlewares('request', request)
+                else:
+                    response = await self.instrumentation.timed(
+                        request, 'request_middlewares',
+                        self.run_middlewares('request', request))
             if response is None:
                 response = text('FIX ME')
                 if isawaitable(response):
                     response = await response
         except Exception as e:
+            if getattr(request, 'resources', None) is not None:
+                # The resources may be left in an inconsistent state.
+                request.resources.failed = True
             try:
                 response = self.error_handler.response(request, e)
                 if isawaitable(response):
@@ -219,9 +350,14 @@ class Taels(HandlersRegistry):
                         status=500)
         finally:
             try:
-                response = await self.run_middlewares(
+                middlewares = self.run_middlewares(
                     'response', request, response,
                     default=response, reverse=True)
+                if self.instrumentation is None:
+                    response = await middlewares
+                else:
+                    response = await self.instrumentation.timed(
+                        request, 'response_middlewares', middlewares)
 
             except BaseException:
                 error_logger.exception(
@@ -234,11 +370,17 @@ class Taels(HandlersRegistry):
         else:
             write_callback(response)
 
-    def run(self, workers=1, auto_reload=False, **kwargs):
+    def run(self, workers=1, auto_reload=False, prefork=False, **kwargs):
+        """Serves the application. With `prefork`, the `before_fork`
+        listeners are run once in the master process, before forking
+        the workers.
+        """
         configuration = server_configuration(
             self, listeners=self.listeners, **kwargs)
         try:
-            if workers == 1:
+            if prefork:
+                Prefork(self, configuration, workers).run()
+            elif workers == 1:
                 if auto_reload and os.name != 'posix':
                     # This condition must be removed after implementing
                     # auto reloader for other operating systems.
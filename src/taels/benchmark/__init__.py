@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks of the publication pipeline.
+
+Run with `python -m taels.benchmark --help`.
+"""
+
+from .fixtures import make_tree, make_app, make_publisher, FakeRequest
+from .runner import Benchmark, run_suite
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+
+from .fixtures import configure, make_tree
+from .runner import dumps, run_suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m taels.benchmark',
+        description="Micro-benchmarks of the taels publication pipeline.")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--breadth', type=int, default=10)
+    parser.add_argument('--middlewares', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--cached', action='store_true',
+                        help="Use the cached model and view lookups.")
+    parser.add_argument('--only', action='append',
+                        help="Run only the given benchmark (repeatable).")
+    parser.add_argument('--output', '-o',
+                        help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    configure()
+    root, paths = make_tree(depth=args.depth, breadth=args.breadth)
+    report = run_suite(
+        root, paths, iterations=args.iterations,
+        middlewares=args.middlewares, cached=args.cached, only=args.only)
+    report['parameters'].update(depth=args.depth, breadth=args.breadth)
+
+    output = dumps(report)
+    if args.output:
+        with open(args.output, 'w') as fd:
+            fd.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Synthetic object trees, views and requests, to exercise the publisher
+and the application without any socket.
+"""
+
+import crom
+
+from urllib.parse import quote
+from zope.interface import implementer
+from taels_server.http.response import text
+
+from .. import publisher
+from ..app import Taels
+from ..deadline import Deadline
+from ..interfaces import IRequest, IResponseFactory
+from ..lineage import Lineage
+
+
+class Node(dict):
+    """A container node of the synthetic tree.
+    """
+
+    def __init__(self, name=None, parent=None):
+        super().__init__()
+        self.__name__ = name
+        self.__parent__ = parent
+
+
+def make_tree(depth=3, breadth=10):
+    """Returns the root of a tree of `Node` objects, `depth` levels deep
+    with `breadth` children per node, and the paths of the leaves.
+    """
+    root = Node()
+    level = [(root, '')]
+    for _ in range(depth):
+        children = []
+        for node, path in level:
+            for index in range(breadth):
+                name = 'node%d' % index
+                child = node[name] = Node(name, node)
+                children.append((child, path + '/' + quote(name)))
+        level = children
+    return root, [path for node, path in level]
+
+
+@implementer(IResponseFactory)
+class View:
+    """A minimalist view, returning a text response.
+    """
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    async def __call__(self):
+        return text(self.context.__name__ or 'root')
+
+
+def find_view(request, obj, name):
+    if name == 'index':
+        return View
+    return None
+
+
+async def lookup_view(request, obj, name):
+    factory = find_view(request, obj, name)
+    if factory is not None:
+        return factory(obj, request)
+    return None
+
+
+@implementer(IRequest)
+class FakeRequest:
+    """Stands for a request as built by the HTTP server.
+    """
+    __slots__ = (
+        'app', 'path', 'method', 'headers', 'body', 'version', 'transport',
+        'scheme', 'host', 'urls', 'lineage', 'resources', 'deadline')
+
+    def __init__(self, path, method='GET', headers=None, body=b''):
+        self.app = None
+        self.path = path
+        self.method = method
+        self.headers = headers or {}
+        self.body = body
+        self.version = '1.1'
+        self.transport = None
+        self.scheme = 'http'
+        self.host = 'localhost'
+        self.urls = None
+        self.lineage = Lineage()
+        self.resources = None
+        self.deadline = Deadline()
+
+
+def configure():
+    """Registers the publisher components.
+    """
+    from crom import testing
+    from .. import url
+    testing.setup()
+    crom.configure(publisher, url)
+
+
+def make_publisher(cached=False):
+    model_lookup = publisher.model_lookup
+    view_lookup = lookup_view
+    if cached:
+        model_lookup = publisher.cached_model_lookup(model_lookup)
+        view_lookup = publisher.cached_view_lookup(find_view)
+    return publisher.Publisher(
+        model_lookup, publisher.view_lookup(view_lookup))
+
+
+def make_app(root, middlewares=5, cached=False):
+    """Returns a `Taels` application running `middlewares` request
+    middlewares and as many response middlewares, the last request
+    middleware publishing `root`.
+    """
+    app = Taels('benchmark')
+    publish = make_publisher(cached=cached)
+
+    def passthrough(*args):
+        return None
+
+    for order in range(middlewares):
+        app.add_middleware('request', passthrough, order=order)
+        app.add_middleware('response', passthrough, order=order)
+
+    async def publication(request):
+        return await publish(request, root)
+
+    app.add_middleware('request', publication, order=middlewares)
+    return app
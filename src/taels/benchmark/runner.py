@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import gc
+import json
+import platform
+import tracemalloc
+
+from itertools import cycle
+from time import perf_counter
+
+from .fixtures import FakeRequest, make_app, make_publisher
+from ..paths import PathCompiler
+from ..publisher import shortcuts
+
+
+def percentile(values, ratio):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+    return values[index]
+
+
+class Benchmark:
+    """Times a coroutine function over a number of iterations.
+    The coroutine function is called with each request of `requests`,
+    cycling over them.
+    """
+
+    def __init__(self, name, func, requests, iterations=10000, warmup=100):
+        self.name = name
+        self.func = func
+        self.requests = requests
+        self.iterations = iterations
+        self.warmup = warmup
+
+    async def timings(self):
+        requests = cycle(self.requests)
+        for _ in range(self.warmup):
+            await self.func(next(requests))
+
+        durations = []
+        gc.collect()
+        for _ in range(self.iterations):
+            request = next(requests)
+            start = perf_counter()
+            await self.func(request)
+            durations.append(perf_counter() - start)
+        return durations
+
+    async def allocations(self, samples=100):
+        """Returns the average peak of allocated bytes per call.
+        """
+        if not hasattr(tracemalloc, 'reset_peak'):
+            return None
+        requests = cycle(self.requests)
+        total = 0
+        tracemalloc.start()
+        try:
+            for _ in range(samples):
+                request = next(requests)
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                await self.func(request)
+                _, peak = tracemalloc.get_traced_memory()
+                total += peak - current
+        finally:
+            tracemalloc.stop()
+        return total // samples
+
+    async def run(self):
+        durations = await self.timings()
+        allocated = await self.allocations()
+        return {
+            'iterations': self.iterations,
+            'requests_per_second': round(len(durations) / sum(durations), 2),
+            'p50_us': round(percentile(durations, 0.50) * 1e6, 2),
+            'p99_us': round(percentile(durations, 0.99) * 1e6, 2),
+            'allocated_bytes': allocated,
+        }
+
+
+def scenarios(root, paths, middlewares=5, cached=False):
+    """Yields the benchmarks of the publication stages.
+    """
+    publish = make_publisher(cached=cached)
+    app = make_app(root, middlewares=middlewares, cached=cached)
+    requests = [FakeRequest(path) for path in paths]
+    compile_path = PathCompiler(shortcuts)
+
+    async def model_lookup(request):
+        return await publish.model_lookup(
+            request, root, compile_path(request.path))
+
+    leaves = {}
+    for request in requests:
+        model, crumbs = asyncio.get_event_loop().run_until_complete(
+            model_lookup(request))
+        leaves[request.path] = model, crumbs
+
+    async def view_lookup(request):
+        model, crumbs = leaves[request.path]
+        return await publish.view_lookup(request, model, crumbs)
+
+    async def publication(request):
+        return await publish.publish(request, root)
+
+    def write(response):
+        pass
+
+    async def stream(response):
+        pass
+
+    async def request_handler(request):
+        return await app.request_handler(request, write, stream)
+
+    yield 'model_lookup', model_lookup, requests
+    yield 'view_lookup', view_lookup, requests
+    yield 'publish', publication, requests
+    yield 'request_handler', request_handler, requests
+
+
+def run_suite(root, paths, iterations=10000, middlewares=5, cached=False,
+              only=None):
+    """Runs the benchmarks and returns a JSON-serializable report.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    results = {}
+    try:
+        for name, func, requests in scenarios(
+                root, paths, middlewares=middlewares, cached=cached):
+            if only and name not in only:
+                continue
+            benchmark = Benchmark(name, func, requests, iterations=iterations)
+            results[name] = loop.run_until_complete(benchmark.run())
+    finally:
+        loop.close()
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'parameters': {
+            'paths': len(paths),
+            'iterations': iterations,
+            'middlewares': middlewares,
+            'cached': cached,
+        },
+        'results': results,
+    }
+
+
+def dumps(report):
+    return json.dumps(report, indent=2, sort_keys=True)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Streaming of the request bodies.
+
+When the application is created with `request_stream`, a sequence of
+path prefixes (or True, for all paths), the server does not buffer the
+request bodies: it feeds the chunks to the `request.stream` queue.
+
+The bodies of the requests outside of these prefixes are read into
+`request.body` before the routes and middlewares run. Within them, the
+body is not read until the publisher resolves the view: the views
+declaring the `streaming` directive get a `BodyStream` as their
+`body_stream` attribute, the others get the body read entirely into
+`request.body`, as if it had been buffered. The routes, middlewares and
+error handlers of these paths must not rely on `request.body`.
+"""
+
+import json
+import re
+
+from collections import namedtuple
+
+
+class BodyStream:
+    """Async iterator over the chunks of the request body.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        stream = self.request.stream
+        if stream is None:
+            # The body was buffered by the server.
+            self.done = True
+            if self.request.body:
+                return self.request.body
+            raise StopAsyncIteration
+        chunk = await stream.get()
+        if chunk is None:
+            self.done = True
+            raise StopAsyncIteration
+        return chunk
+
+    async def read(self):
+        return b''.join([chunk async for chunk in self])
+
+
+async def json_lines(chunks, encoding='utf-8'):
+    """Yields the objects of a JSON lines body, as soon as each line
+    is received.
+    """
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield json.loads(line.decode(encoding))
+    if buffer.strip():
+        yield json.loads(buffer.decode(encoding))
+
+
+Part = namedtuple('Part', ['headers', 'name', 'filename', 'content_type'])
+
+
+PARAMETER = re.compile(r';\s*([\w*-]+)=(?:"((?:[^"\\]|\\.)*)"|([^;]*))')
+
+
+def header_parameters(value):
+    parameters = {}
+    for match in PARAMETER.finditer(value):
+        key, quoted, plain = match.groups()
+        parameters[key.lower()] = (
+            quoted if quoted is not None else plain.strip())
+    return parameters
+
+
+def make_part(block, encoding='utf-8'):
+    headers = {}
+    for line in block.decode(encoding, 'replace').split('\r\n'):
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    disposition = header_parameters(headers.get('content-disposition', ''))
+    return Part(headers=headers, name=disposition.get('name'),
+                filename=disposition.get('filename'),
+                content_type=headers.get('content-type', 'text/plain'))
+
+
+def boundary_of(content_type):
+    """Returns the multipart boundary of a Content-Type header value.
+    """
+    boundary = header_parameters(content_type).get('boundary')
+    if not boundary:
+        raise ValueError('No multipart boundary in %r.' % content_type)
+    return boundary
+
+
+async def multipart(chunks, boundary, max_header_size=16384):
+    """Parses a multipart body incrementally.
+
+    Yields a `Part` when the headers of a part are received, then the
+    chunks of its content as bytes, as they arrive.
+    """
+    if isinstance(boundary, str):
+        boundary = boundary.encode('latin-1')
+    delimiter = b'--' + boundary
+    separator = b'\r\n' + delimiter
+    buffer = b''
+    state = 'preamble'
+
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            if state == 'preamble':
+                index = buffer.find(delimiter)
+                if index < 0:
+                    buffer = buffer[-len(delimiter):]
+                    break
+                buffer = buffer[index + len(delimiter):]
+                state = 'delimiter'
+
+            elif state == 'delimiter':
+                if len(buffer) < 2:
+                    break
+                if buffer.startswith(b'--'):
+                    # Closing delimiter: the epilogue is ignored.
+                    return
+                state = 'headers'
+
+            elif state == 'headers':
+                index = buffer.find(b'\r\n\r\n')
+                if index < 0:
+                    if len(buffer) > max_header_size:
+                        raise ValueError('Multipart headers are too large.')
+                    break
+                yield make_part(buffer[:index].lstrip(b'\r\n'))
+                buffer = buffer[index + 4:]
+                state = 'content'
+
+            elif state == 'content':
+                index = buffer.find(separator)
+                if index < 0:
+                    # Keep what could be the beginning of the separator.
+                    keep = len(separator) - 1
+                    if len(buffer) > keep:
+                        yield buffer[:-keep]
+                        buffer = buffer[-keep:]
+                    break
+                if index:
+                    yield buffer[:index]
+                buffer = buffer[index + len(separator):]
+                state = 'delimiter'
+
+    if state != 'delimiter' or not buffer.startswith(b'--'):
+        raise ValueError('Truncated multipart body.')
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Bounded in-memory caches used by the publication machinery.
+"""
+
+from collections import OrderedDict
+from time import monotonic
+
+
+_marker = object()
+
+
+class LRUCache:
+    """A bounded mapping discarding the least recently used entries.
+
+    `maxsize` bounds the total weight of the entries. By default, each
+    entry weighs 1, `weigh` can be given to compute the weight of a value
+    (e.g. its length in bytes). If `ttl` is given, entries older than `ttl`
+    seconds are considered missing.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _marker) is not _marker
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, weight, expires = entry
+            if expires is None or expires > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.delete(key)
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires = monotonic() + ttl if ttl is not None else None
+        weight = self.weigh(value) if self.weigh is not None else 1
+        if weight > self.maxsize:
+            # Would evict everything and still not fit.
+            self.delete(key)
+            return False
+        self.delete(key)
+        self._entries[key] = (value, weight, expires)
+        self.weight += weight
+        while self.weight > self.maxsize:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.weight -= evicted
+        return True
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[1]
+            return True
+        return False
+
+    def discard(self, predicate):
+        """Removes all the entries whose key satisfies the predicate.
+        """
+        for key in [key for key in self._entries if predicate(key)]:
+            self.delete(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.weight = 0
+
+
+class TraversalCache(LRUCache):
+    """Caches the results of a model lookup.
+
+    Keys are `(id(root), path, predicates)` tuples. The root itself is
+    stored along with the result (model, crumbs and lineage snapshot),
+    to guard against a recycled identity.
+    """
+
+    def lookup(self, root, key):
+        entry = self.get(key)
+        if entry is not None and entry[0] is root:
+            return entry[1:]
+        return None
+
+    def store(self, root, key, model, crumbs, lineage):
+        self.set(key, (root, model, tuple(crumbs), lineage))
+
+    def invalidate(self, root=None, path=None):
+        """Drops the cached traversals. Invalidation can be restricted to
+        a given root and to the paths starting with the given `path`,
+        expressed as a sequence of (namespace, name) tuples.
+        """
+        if root is None and path is None:
+            return self.clear()
+
+        rid = id(root) if root is not None else None
+        path = tuple(path) if path is not None else None
+
+        def matches(key):
+            if rid is not None and key[0] != rid:
+                return False
+            if path is not None and key[1][:len(path)] != path:
+                return False
+            return True
+
+        self.discard(matches)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Caching of the rendered responses, with conditional requests handling.
+
+A view is cacheable if it declares it with the `cacheable` directive,
+giving the time to live of its responses in seconds (0 meaning the
+default time to live of the cache). The `vary` directive lists the
+request headers the response depends on. Views protected by a
+permission are never cached.
+"""
+
+import hashlib
+
+from collections import namedtuple
+from email.utils import formatdate, parsedate_to_datetime
+from time import time
+from taels_server.http.response import HTTPResponse, StreamingHTTPResponse
+
+from .cache import LRUCache
+from .directives import cacheable, permission, vary
+
+
+CachedResponse = namedtuple('CachedResponse', [
+    'model', 'body', 'status', 'content_type', 'headers', 'etag',
+    'modified'])
+
+# The varying headers of the cached responses of a (model, view name).
+Varying = namedtuple('Varying', ['model', 'headers'])
+
+
+def weigh(entry):
+    if isinstance(entry, Varying):
+        return 64 + sum(len(header) for header in entry.headers)
+    return len(entry.body)
+
+
+def view_name(crumbs):
+    """Returns the name of the view the unconsumed crumbs resolve to.
+    """
+    if not crumbs:
+        return 'index'
+    ns, name = crumbs[0]
+    return name
+
+
+def not_modified(request, entry):
+    """Tells if the client copy of the cached response is still valid.
+    """
+    etags = request.headers.get('If-None-Match')
+    if etags is not None:
+        etags = [etag.strip() for etag in etags.split(',')]
+        return '*' in etags or entry.etag in etags or (
+            'W/' + entry.etag) in etags
+
+    since = request.headers.get('If-Modified-Since')
+    if since is not None:
+        try:
+            return parsedate_to_datetime(since).timestamp() >= entry.modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ResponseCache:
+    """Stores the rendered responses per (model, view name, query
+    string, values of the varying headers), within a memory budget of
+    `max_bytes`. The varying headers of each (model, view name) are kept
+    in the same bounded cache.
+
+    Models are identified using `model_key`, defaulting to `id`. The
+    model itself is kept with the response, to make sure the identity
+    was not recycled. Applications recreating their models at each
+    traversal should give a key function based on a persistent id.
+    """
+
+    methods = frozenset(('GET', 'HEAD'))
+
+    def __init__(self, ttl=60, max_bytes=64 * 1024 * 1024, model_key=id):
+        self.model_key = model_key
+        self.entries = LRUCache(maxsize=max_bytes, ttl=ttl, weigh=weigh)
+
+    def key(self, request, base, headers):
+        return base + (request.query_string,
+                       tuple(request.headers.get(h) for h in headers))
+
+    def validators(self, entry):
+        return {'ETag': entry.etag,
+                'Last-Modified': formatdate(entry.modified, usegmt=True)}
+
+    def lookup(self, request, model, crumbs):
+        """Returns a response from the cache, if any, or None.
+        This is called before the view lookup.
+        """
+        if request.method not in self.methods:
+            return None
+
+        base = (self.model_key(model), view_name(crumbs))
+        varying = self.entries.get(base)
+        if varying is None or varying.model is not model:
+            # Nothing is cached for this view.
+            return None
+
+        entry = self.entries.get(self.key(request, base, varying.headers))
+        if entry is None or entry.model is not model:
+            return None
+
+        if not_modified(request, entry):
+            return HTTPResponse(status=304, headers=self.validators(entry))
+
+        return HTTPResponse(
+            body_bytes=entry.body, status=entry.status,
+            headers=dict(entry.headers), content_type=entry.content_type)
+
+    def store(self, request, model, crumbs, component, response):
+        """Caches the response, if the view is cacheable.
+        Returns the response to send, which can be a 304 response.
+        """
+        ttl = cacheable.get(component)
+        if (ttl is None or permission.get(component) is not None or
+                request.method not in self.methods or
+                response.status != 200 or
+                isinstance(response, StreamingHTTPResponse)):
+            return response
+
+        base = (self.model_key(model), view_name(crumbs))
+        headers = tuple(sorted(vary.get(component, ())))
+        self.entries.set(base, Varying(model, headers), ttl=ttl or None)
+
+        body = response.body
+        entry = CachedResponse(
+            model=model, body=body, status=response.status,
+            content_type=response.content_type, headers=None,
+            etag='"%s"' % hashlib.sha1(body).hexdigest(), modified=int(time()))
+
+        response.headers.update(self.validators(entry))
+        if headers:
+            response.headers['Vary'] = ', '.join(headers)
+        entry = entry._replace(headers=tuple(response.headers.items()))
+        self.entries.set(
+            self.key(request, base, headers), entry, ttl=ttl or None)
+
+        if not_modified(request, entry):
+            return HTTPResponse(status=304, headers=self.validators(entry))
+        return response
+
+    def invalidate(self, model=None):
+        """Drops the cached responses of the given model, or all of them.
+        """
+        if model is None:
+            return self.entries.clear()
+        model_key = self.model_key(model)
+        self.entries.discard(lambda key: key[0] == model_key)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Per-request deadlines.
+
+The application sets the `deadline` of the request when it receives
+it, from the `REQUEST_DEADLINE` configuration value, in seconds (None
+meaning no deadline). The publisher checks it during the traversal and
+before the view lookup, and cancels the response factory when the
+deadline is reached. Views can use it to bound their downstream calls.
+
+Request classes without a `deadline` slot are served without deadline.
+"""
+
+import asyncio
+
+from inspect import iscoroutine
+from time import monotonic
+from taels_server.http.exceptions import ServerError
+
+
+class DeadlineExceeded(ServerError):
+    status_code = 503
+
+
+class Deadline:
+    __slots__ = ('expires',)
+
+    def __init__(self, timeout=None):
+        self.expires = monotonic() + timeout if timeout is not None else None
+
+    def remaining(self):
+        """Returns the remaining seconds, or None if there's no deadline.
+        """
+        if self.expires is None:
+            return None
+        return max(0., self.expires - monotonic())
+
+    @property
+    def expired(self):
+        return self.expires is not None and monotonic() >= self.expires
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded('The request deadline is exceeded.')
+
+    async def run(self, awaitable):
+        """Awaits the given awaitable, cancelling it if the deadline is
+        reached first.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        if not remaining:
+            if iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded('The request deadline is exceeded.')
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded('The request deadline is exceeded.')
+
+
+NO_DEADLINE = Deadline()
+
+
+def deadline_of(request):
+    """Returns the deadline of the request, or a deadline never expiring
+    if the request has none.
+    """
+    return getattr(request, 'deadline', None) or NO_DEADLINE
@@ -37,6 +37,17 @@ def class_or_interface_extends(extension_core):
 
 
 
+def choice_validator(*choices):
+
+    def validate_choice(directive_name, value):
+        if value not in choices:
+            raise validator.GrokkerValidationError(
+                "The '%s' directive can only be called with one of %s." % (
+                    directive_name, ', '.join(map(repr, choices))))
+
+    return validate_choice
+
+
 request = Directive(
     'request', 'cromlech',
     validator=class_or_interface_extends(IRequest))
@@ -74,3 +85,38 @@ description = Directive(
 traversable = ArgsDirective(
     'traversable', 'dawnlight',
     validator=validator.str_validator, set_policy=freeze)
+
+
+cacheable = Directive(
+    'cacheable', 'taels',
+    validator=validator.int_validator)
+
+
+vary = ArgsDirective(
+    'vary', 'taels',
+    validator=validator.str_validator, set_policy=freeze)
+
+
+blocking = Directive(
+    'blocking', 'taels',
+    validator=choice_validator('thread'))
+
+
+permission = Directive(
+    'permission', 'taels',
+    validator=validator.str_validator)
+
+
+fragment = Directive(
+    'fragment', 'taels',
+    validator=validator.str_validator)
+
+
+depends = ArgsDirective(
+    'depends', 'taels',
+    validator=validator.str_validator, set_policy=freeze)
+
+
+streaming = Directive(
+    'streaming', 'taels',
+    validator=choice_validator(True, False))
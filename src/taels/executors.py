@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Offloading of the blocking components to executors.
+
+A component (view, traverser...) declaring the `blocking` directive,
+with 'thread', is called by the publisher in the thread pool of the
+application `offloader`, instead of the event loop.
+
+Only synchronous callables can be offloaded: a coroutine function of
+a blocking component is an error, unless it is marked as `offloading`
+the blocking parts of its component itself (as `JSONView` does). The
+rendering pipeline offloads the `update` and `render` methods of the
+blocking renderables.
+
+There is no process pool: the offloaded callables are bound to the
+request, which can't be pickled.
+"""
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from inspect import isawaitable
+
+from .directives import blocking
+from .utils import is_coroutine
+
+
+class Pool:
+    """An executor with a bounded amount of pending calls.
+    Calls exceeding `max_pending` wait on the event loop for a slot.
+    """
+
+    def __init__(self, executor, max_pending=None):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.waiting = 0
+        self.running = 0
+        self.peak = 0
+        self.completed = 0
+        self._slots = None
+
+    async def run(self, func, *args):
+        if self._slots is None and self.max_pending is not None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        self.waiting += 1
+        self.peak = max(self.peak, self.waiting + self.running)
+        try:
+            if self._slots is not None:
+                await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            return await asyncio.get_event_loop().run_in_executor(
+                self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self):
+        return {
+            'waiting': self.waiting,
+            'running': self.running,
+            'peak': self.peak,
+            'completed': self.completed,
+        }
+
+
+class Offloader:
+    """Holds the pools of an application, per kind of `blocking`.
+    """
+
+    def __init__(self, threads=None, max_pending=None):
+        self.pools = {
+            'thread': Pool(ThreadPoolExecutor(threads), max_pending)}
+
+    async def run(self, kind, func, *args):
+        pool = self.pools.get(kind)
+        if pool is None:
+            raise LookupError('No %r pool configured.' % kind)
+        return await pool.run(func, *args)
+
+    def stats(self):
+        return {kind: pool.stats() for kind, pool in self.pools.items()}
+
+    def shutdown(self, wait=True):
+        for pool in self.pools.values():
+            pool.executor.shutdown(wait=wait)
+
+
+def offloading(func):
+    """Marks a coroutine function offloading the blocking parts of its
+    component itself: `call` runs it on the event loop.
+    """
+    func.offloading = True
+    return func
+
+
+def is_offloading(func):
+    return getattr(func, 'offloading', False) or getattr(
+        getattr(type(func), '__call__', None), 'offloading', False)
+
+
+async def call(request, component, func, *args):
+    """Calls `func`, in a pool of the application offloader if the
+    component is marked as blocking, then awaits the result if needed.
+    """
+    kind = blocking.get(component)
+    offloader = None
+    if kind is not None:
+        if is_offloading(func):
+            kind = None
+        elif is_coroutine(func):
+            raise TypeError(
+                '%r is a coroutine function of the blocking component %r: '
+                'only synchronous callables can be offloaded.' % (
+                    func, component))
+        else:
+            offloader = getattr(
+                getattr(request, 'app', None), 'offloader', None)
+
+    if offloader is not None:
+        result = await offloader.run(kind, func, *args)
+    else:
+        result = func(*args)
+
+    if isawaitable(result):
+        result = await result
+    return result
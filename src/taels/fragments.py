@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Caching of the rendered fragments (slots), with dependency tags.
+
+A renderer declares the key of its output with the `fragment` directive.
+The key is formatted with the renderer as `slot`, and its `view`,
+`context` and `request`, e.g. `fragment('navigation-{request.host}')`.
+The `depends` directive lists the tags the output depends on: bumping
+a tag, with `FragmentCache.invalidate`, invalidates the fragments
+depending on it.
+
+Tags are versioned: a fragment is stored with the generations of its
+tags, and is stale as soon as one of them changed. Invalidation is O(1)
+and works the same with the shared memory backend, across workers.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+
+from time import time
+
+from .cache import LRUCache
+from .directives import depends, fragment
+from .utils import dotted_name
+
+
+class MemoryBackend:
+    """In-process backend, bounded by the total length of the outputs.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.entries = LRUCache(
+            maxsize=max_bytes, weigh=lambda entry: len(entry[0]))
+        self.tags = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries.set(key, value)
+
+    def generation(self, tag):
+        return self.tags.get(tag, 0)
+
+    def bump(self, tag):
+        self.tags[tag] = self.tags.get(tag, 0) + 1
+
+    def clear(self):
+        self.entries.clear()
+
+
+def digest(value):
+    return hashlib.blake2b(
+        repr(value).encode('utf-8'), digest_size=16).digest()
+
+
+class SharedMemoryBackend:
+    """Direct-mapped cache in anonymous shared memory. It must be created
+    before the workers are forked (e.g. by a `before_fork` listener), to
+    be shared with them.
+
+    The memory is divided in `slots` slots of `slot_size` bytes: an entry
+    goes in the slot of its key hash, replacing the previous one. Entries
+    larger than a slot are not cached. Tags generations are counters in
+    a table of `tags` entries, indexed by the tags hash.
+
+    There is no lock, which a killed worker could leave acquired: each
+    entry is stored with a checksum of its key and data, and an entry torn
+    by concurrent writes is a cache miss. A bumped tag gets a random
+    generation, so concurrent bumps can't cancel each other.
+    """
+    header = struct.Struct('<16sI16s')
+    counter = struct.Struct('<Q')
+
+    def __init__(self, slots=1024, slot_size=16 * 1024, tags=4096):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.tags_size = tags
+        self.memory = mmap.mmap(-1, slots * slot_size)
+        self.tags = mmap.mmap(-1, tags * self.counter.size)
+
+    def locate(self, key):
+        key = digest(key)
+        return key, (int.from_bytes(key[:8], 'little') % self.slots
+                     ) * self.slot_size
+
+    def checksum(self, key, data):
+        return hashlib.blake2b(key + data, digest_size=16).digest()
+
+    def get(self, key):
+        key, offset = self.locate(key)
+        start = offset + self.header.size
+        stored, length, checksum = self.header.unpack_from(
+            self.memory, offset)
+        if stored != key or not length or \
+                length > self.slot_size - self.header.size:
+            return None
+        data = self.memory[start:start + length]
+        if self.checksum(key, data) != checksum:
+            # Being written, or torn by concurrent writes.
+            return None
+        return pickle.loads(data)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) + self.header.size > self.slot_size:
+            return
+        key, offset = self.locate(key)
+        start = offset + self.header.size
+        self.header.pack_into(
+            self.memory, offset, key, len(data), self.checksum(key, data))
+        self.memory[start:start + len(data)] = data
+
+    def tag_offset(self, tag):
+        index = int.from_bytes(digest(tag)[:8], 'little') % self.tags_size
+        return index * self.counter.size
+
+    def generation(self, tag):
+        return self.counter.unpack_from(self.tags, self.tag_offset(tag))[0]
+
+    def bump(self, tag):
+        offset = self.tag_offset(tag)
+        generation, = self.counter.unpack_from(self.tags, offset)
+        new = generation
+        while new == generation:
+            new = int.from_bytes(os.urandom(self.counter.size), 'little')
+        self.counter.pack_into(self.tags, offset, new)
+
+    def clear(self):
+        for offset in range(0, len(self.memory), self.slot_size):
+            self.header.pack_into(self.memory, offset, b'', 0, b'')
+
+
+class FragmentCache:
+    """Caches rendered outputs, with an optional time to live.
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+
+    def generations(self, tags):
+        return tuple(self.backend.generation(tag) for tag in sorted(tags))
+
+    def get(self, key, tags=()):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        output, generations, expires = entry
+        if expires is not None and expires < time():
+            return None
+        if generations != self.generations(tags):
+            return None
+        return output
+
+    def set(self, key, output, tags=()):
+        expires = time() + self.ttl if self.ttl is not None else None
+        self.backend.set(key, (output, self.generations(tags), expires))
+
+    def invalidate(self, *tags):
+        """Invalidates the fragments depending on any of the tags.
+        """
+        for tag in tags:
+            self.backend.bump(tag)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def fragment_key(renderer):
+    """Returns the cache key and the tags of the renderer output,
+    or (None, ()) if it is not cacheable.
+    """
+    key = fragment.get(renderer)
+    if key is None:
+        return None, ()
+    view = getattr(renderer, 'view', None)
+    key = key.format(
+        slot=renderer, view=view,
+        context=getattr(renderer, 'context', getattr(view, 'context', None)),
+        request=getattr(renderer, 'request', getattr(view, 'request', None)))
+    return (dotted_name(renderer.__class__), key), (
+        depends.get(renderer) or ())
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Snapshots of the components registries.
+
+Once an application is configured (its modules grokked), the content of
+its registries can be dumped to a JSON file. At the next start, loading
+this file registers the same components again, importing their modules
+without grokking them. The registries can then be frozen, refusing any
+further registration.
+
+Only components with an importable dotted name (functions, classes,
+module-level objects) can be dumped. The required specifications must
+be interfaces or classes.
+
+    registries = {'implicit': crom.implicit.lookup,
+                  'dawnlight': taels.publisher.dawnlight_components}
+    if os.path.exists(path):
+        load(path, registries)
+    else:
+        crom.configure(*modules)
+        dump(path, registries)
+"""
+
+import json
+
+from importlib import import_module
+from zope.interface import implementedBy
+from zope.interface.interfaces import IInterface
+
+from .utils import dotted_name
+
+
+FORMAT = 1
+
+
+def adapters_of(registry):
+    """Returns the zope.interface adapter registry of a crom registry.
+    """
+    return getattr(registry, 'registry', registry)
+
+
+def resolve(name):
+    module, _, qualname = name.partition(':')
+    obj = import_module(module)
+    for attribute in qualname.split('.'):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def spec_reference(spec):
+    if spec is None:
+        return None
+    if IInterface.providedBy(spec):
+        return ['interface', '%s:%s' % (spec.__module__, spec.__name__)]
+    cls = getattr(spec, 'inherit', None)
+    if cls is not None:
+        # The specification of the instances of a class.
+        return ['class', dotted_name(cls)]
+    raise ValueError('Specification %r can not be dumped.' % spec)
+
+
+def resolve_spec(reference):
+    if reference is None:
+        return None
+    kind, name = reference
+    obj = resolve(name)
+    return implementedBy(obj) if kind == 'class' else obj
+
+
+def component_reference(component):
+    name = getattr(component, '__qualname__', None)
+    if name is None or '<' in name:
+        raise ValueError('Component %r can not be dumped.' % component)
+    return dotted_name(component)
+
+
+def walk(mapping, depth, required=()):
+    """Yields the (required, provided, leaf) of the nested mappings of
+    a zope.interface adapter registry, `depth` being the number of
+    required specifications.
+    """
+    if not depth:
+        for provided, leaf in mapping.items():
+            yield required, provided, leaf
+    else:
+        for spec, nested in mapping.items():
+            yield from walk(nested, depth - 1, required + (spec,))
+
+
+def snapshot(registry):
+    """Returns the JSON-serializable content of a registry.
+    """
+    adapters = adapters_of(registry)
+    registrations = []
+    for depth, mapping in enumerate(adapters._adapters):
+        for required, provided, names in walk(mapping, depth):
+            for name, component in names.items():
+                registrations.append([
+                    [spec_reference(spec) for spec in required],
+                    spec_reference(provided), name,
+                    component_reference(component)])
+
+    subscriptions = []
+    for depth, mapping in enumerate(adapters._subscribers):
+        for required, provided, names in walk(mapping, depth):
+            for component in names.get('', ()):
+                subscriptions.append([
+                    [spec_reference(spec) for spec in required],
+                    spec_reference(provided),
+                    component_reference(component)])
+
+    return {'adapters': registrations, 'subscriptions': subscriptions}
+
+
+def restore(registry, content):
+    adapters = adapters_of(registry)
+    for required, provided, name, component in content['adapters']:
+        adapters.register(
+            [resolve_spec(spec) for spec in required],
+            resolve_spec(provided), name, resolve(component))
+    for required, provided, component in content['subscriptions']:
+        adapters.subscribe(
+            [resolve_spec(spec) for spec in required],
+            resolve_spec(provided), resolve(component))
+
+
+def dump(path, registries):
+    """Writes the snapshots of the registries, a mapping of names to
+    registries, to `path`.
+    """
+    content = {name: snapshot(registry)
+               for name, registry in registries.items()}
+    with open(path, 'w', encoding='utf-8') as fd:
+        json.dump({'format': FORMAT, 'registries': content}, fd)
+
+
+def load(path, registries, frozen=True):
+    """Restores the registries dumped to `path`, then freezes them.
+    """
+    with open(path, encoding='utf-8') as fd:
+        content = json.load(fd)
+    if content.get('format') != FORMAT:
+        raise ValueError('Unsupported registries snapshot format.')
+    for name, registry in registries.items():
+        restore(registry, content['registries'][name])
+        if frozen:
+            freeze(registry)
+
+
+def frozen_registration(*args, **kwargs):
+    raise RuntimeError('The registry is frozen.')
+
+
+def freeze(registry):
+    """Makes the registry read-only: the lookup caches depending on it
+    never need to be invalidated.
+    """
+    adapters = adapters_of(registry)
+    adapters.register = adapters.subscribe = frozen_registration
+    adapters.unregister = adapters.unsubscribe = frozen_registration
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Timing of the request handling stages.
+
+An `Instrumentation` is set as the `instrumentation` attribute of the
+application. When it is None (the default), the request handling is not
+timed at all. The recorded stages are:
+
+  * `request_middlewares` and `response_middlewares` : the middlewares
+    chains, run by the application. When the publisher is run by a
+    request middleware, its own stages are included in the former.
+  * `traversal` : the model lookup, and `traversal.<consumer>` for each
+    segment consumed by a traversal consumer.
+  * `view_lookup` : the resolution of the view.
+  * `response_factory` : the call of the response factory.
+"""
+
+import logging
+
+from bisect import bisect_left
+from time import perf_counter
+from taels_server.http.response import text
+
+
+DEFAULT_BUCKETS = (
+    .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5,
+    1., 2.5, 5., 10.)
+
+
+def instrumentation_for(request):
+    """Returns the instrumentation of the application handling the request,
+    if any.
+    """
+    return getattr(getattr(request, 'app', None), 'instrumentation', None)
+
+
+class Instrumentation:
+    """Dispatches the recorded timings to sinks.
+    A sink is an object with a `record(request, stage, duration)` method.
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def record(self, request, stage, duration):
+        for sink in self.sinks:
+            sink.record(request, stage, duration)
+
+    async def timed(self, request, stage, awaitable):
+        start = perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.record(request, stage, perf_counter() - start)
+
+
+class Histogram:
+    """Cumulative histogram of durations, in seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Yields (upper bound, cumulative count) pairs, the last upper
+        bound being infinite.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class HistogramSink:
+    """Aggregates the timings in memory, in a histogram per stage.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS,
+                 metric='taels_stage_duration_seconds'):
+        self.buckets = buckets
+        self.metric = metric
+        self.histograms = {}
+
+    def record(self, request, stage, duration):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram(self.buckets)
+        histogram.observe(duration)
+
+    def exposition(self):
+        """Returns the histograms in the Prometheus text format.
+        """
+        lines = [
+            '# HELP %s Duration of the request handling stages.' % (
+                self.metric),
+            '# TYPE %s histogram' % self.metric,
+        ]
+        for stage in sorted(self.histograms):
+            histogram = self.histograms[stage]
+            for bound, count in histogram.cumulative():
+                lines.append('%s_bucket{stage="%s",le="%s"} %d' % (
+                    self.metric, stage,
+                    '+Inf' if bound == float('inf') else repr(bound), count))
+            lines.append('%s_sum{stage="%s"} %r' % (
+                self.metric, stage, histogram.sum))
+            lines.append('%s_count{stage="%s"} %d' % (
+                self.metric, stage, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+
+class LogSink:
+    """Logs a line per recorded timing.
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('taels.instrumentation')
+        self.level = level
+
+    def record(self, request, stage, duration):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level, '%s %s %.6f', getattr(request, 'path', '-'),
+                stage, duration)
+
+
+def exposition_middleware(sink, path='/metrics'):
+    """Returns a request middleware answering the requests on `path`
+    with the Prometheus exposition of the given `HistogramSink`.
+    """
+    def metrics(request):
+        if request.path == path:
+            return text(sink.exposition(),
+                        content_type='text/plain; version=0.0.4')
+        return None
+    return metrics
@@ -35,7 +35,18 @@ class IResponseFactory(Interface):
     """
 
     def __call__():
-        """Returns a IResponse object.
+        """Returns a IResponse object, or an iterator (possibly async)
+        of chunks, to be streamed.
+        """
+
+
+class IPublishable(Interface):
+    """A published object rendering itself, independently of any request.
+    Such objects can be cached and shared by the traversals.
+    """
+
+    def bind(request):
+        """Returns the IResponseFactory of the object for the request.
         """
 
 
@@ -58,7 +69,8 @@ class IRenderable(Interface):
     When a renderable is rendered, first the update method is called
     to prepare it for rendering. After this, the render method is used
     to actually render the view. The render method returns either a
-    unicode string with the rendered content, or an IResponse object.
+    unicode string with the rendered content, an iterator (possibly async)
+    of chunks of content, or an IResponse object.
     """
 
     def update():
@@ -130,6 +142,17 @@ class ITraverser(Interface):
         """
 
 
+class ISecurityPolicy(Interface):
+    """Decides whether a principal is granted permissions on objects.
+    """
+
+    def check(principal, checks):
+        """Coroutine deciding a batch of checks, as a sequence of
+        (permission, object) pairs. Returns a sequence of booleans,
+        one per check, in the same order.
+        """
+
+
 class IPublisher(Interface):
     """Defines the component in charge of the publication process.
     It usually returns an `IResponse` object.
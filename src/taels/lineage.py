@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Location tracking of the traversed objects.
+
+Instead of wrapping each traversed object in a location proxy, the
+traversal records the objects and the consumed segments in two flat
+lists, held by the request: `objects[i + 1]` was reached from
+`objects[i]` consuming `segments[i]`.
+
+Requests which can't hold a lineage (without a `lineage` slot) are
+traversed with a detached one: nothing is recorded for them.
+"""
+
+
+class Lineage:
+    __slots__ = ('objects', 'segments')
+
+    def __init__(self):
+        self.objects = []
+        self.segments = []
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    @property
+    def root(self):
+        return self.objects[0] if self.objects else None
+
+    @property
+    def leaf(self):
+        return self.objects[-1] if self.objects else None
+
+    def start(self, obj):
+        """Starts a traversal from `obj`. If `obj` is the last traversed
+        object, the traversal is considered as continuing.
+        """
+        if not self.objects or self.objects[-1] is not obj:
+            self.objects[:] = [obj]
+            del self.segments[:]
+
+    def append(self, obj, segment):
+        """Records that `obj` was reached from the last traversed object
+        consuming the (namespace, name) segment.
+        """
+        self.objects.append(obj)
+        self.segments.append(segment)
+
+    def restore(self, objects, segments):
+        self.objects[:] = objects
+        self.segments[:] = segments
+
+    def snapshot(self):
+        return tuple(self.objects), tuple(self.segments)
+
+    def locate(self, obj):
+        """Returns the (parent, segment) through which `obj` was reached,
+        or None if it was not traversed (or is the root).
+        """
+        objects = self.objects
+        for index in range(len(objects) - 1, 0, -1):
+            if objects[index] is obj:
+                return objects[index - 1], self.segments[index - 1]
+        return None
+
+
+def lineage_of(request):
+    """Returns the lineage of the request, creating it if needed.
+    """
+    lineage = getattr(request, 'lineage', None)
+    if lineage is None:
+        lineage = Lineage()
+        try:
+            request.lineage = lineage
+        except AttributeError:
+            # The request class has no `lineage` slot.
+            pass
+    return lineage
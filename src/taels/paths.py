@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Compilation of the request paths into traversal stacks.
+"""
+
+import dawnlight
+
+from itertools import islice
+from sys import intern
+from urllib.parse import unquote
+
+from .cache import LRUCache
+
+
+class PathStack:
+    """The (namespace, name) segments of a path, with a cursor.
+
+    It behaves as the deque used by the consumers (`stack[0]`,
+    `stack.popleft()`, `len(stack)`), but the segments are an immutable
+    tuple shared by the copies: copying and consuming is O(1).
+    """
+    __slots__ = ('segments', 'cursor')
+
+    def __init__(self, segments=(), cursor=0):
+        self.segments = tuple(segments)
+        self.cursor = cursor
+
+    def __len__(self):
+        return len(self.segments) - self.cursor
+
+    def __bool__(self):
+        return self.cursor < len(self.segments)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.remaining()[index]
+        if index < 0:
+            index += len(self)
+        if index < 0 or self.cursor + index >= len(self.segments):
+            raise IndexError('stack index out of range')
+        return self.segments[self.cursor + index]
+
+    def __iter__(self):
+        return islice(self.segments, self.cursor, None)
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return 'PathStack(%r)' % (self.remaining(),)
+
+    def __copy__(self):
+        return PathStack(self.segments, self.cursor)
+
+    copy = __copy__
+
+    def popleft(self):
+        if self.cursor >= len(self.segments):
+            raise IndexError('pop from an empty stack')
+        segment = self.segments[self.cursor]
+        self.cursor += 1
+        return segment
+
+    def remaining(self):
+        if not self.cursor:
+            return self.segments
+        return self.segments[self.cursor:]
+
+
+def parse_path(path, shortcuts=None):
+    """Splits an unquoted path into a tuple of interned (namespace, name)
+    segments, handling the shortcuts (e.g. '@@') and the `++ns++name`
+    namespaces in a single pass.
+    """
+    segments = []
+    for token in path.split('/'):
+        if not token:
+            continue
+        ns = dawnlight.DEFAULT
+        if shortcuts:
+            for prefix, namespace in shortcuts.items():
+                if token.startswith(prefix):
+                    ns, token = namespace, token[len(prefix):]
+                    break
+        if ns is dawnlight.DEFAULT and token.startswith('++'):
+            namespace, sep, name = token[2:].partition('++')
+            if sep and namespace:
+                ns, token = namespace, name
+        segments.append((intern(ns), intern(token)))
+    return tuple(segments)
+
+
+class PathCompiler:
+    """Memoizes the parsed segments of the recently seen raw paths.
+    """
+
+    def __init__(self, shortcuts=None, maxsize=4096):
+        self.shortcuts = shortcuts
+        self.cache = LRUCache(maxsize=maxsize)
+
+    def __call__(self, path):
+        segments = self.cache.get(path)
+        if segments is None:
+            segments = parse_path(unquote(path), self.shortcuts)
+            self.cache.set(path, segments)
+        return PathStack(segments)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Pre-fork multi-workers serving.
+
+The master process runs the `before_fork` listeners once (to register
+components and warm caches up), freezes the garbage collector to keep
+the inherited memory pages shared, then forks the workers. Each worker
+binds its own socket with SO_REUSEPORT, letting the kernel balance the
+connections. The master checks the address can be bound before forking.
+Dead workers are restarted by the master, unless they all die at startup.
+"""
+
+import asyncio
+import gc
+import os
+import signal
+import socket
+
+from inspect import isawaitable
+from time import monotonic, sleep
+from taels_server import server
+from taels_server.log import logger, error_logger
+
+
+# Minimal lifetime of a worker, under which its restart is delayed.
+RESPAWN_DELAY = 1.
+
+
+def reuseport_socket(host, port):
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def exit_code(status):
+    """Returns the exit code of a `os.wait` status: negative for a signal.
+    """
+    if hasattr(os, 'waitstatus_to_exitcode'):
+        return os.waitstatus_to_exitcode(status)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+async def run_listeners(app, event, loop):
+    for listener in app.get_listeners(event):
+        result = listener(app, loop)
+        if isawaitable(result):
+            await result
+
+
+class Prefork:
+
+    def __init__(self, app, configuration, workers):
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise NotImplementedError(
+                'The pre-fork mode requires SO_REUSEPORT.')
+        if configuration.get('sock') is not None:
+            raise ValueError('The pre-fork mode binds its own sockets.')
+        self.app = app
+        self.workers = workers
+        self.host = configuration['host']
+        self.port = configuration['port']
+        self.configuration = dict(configuration, host=None, port=None)
+        self.children = {}
+        self.running = False
+
+    def warmup(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(
+                run_listeners(self.app, 'before_fork', loop))
+        finally:
+            loop.close()
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            # Survivors won't be touched by the collector anymore,
+            # keeping the forked pages shared.
+            gc.freeze()
+
+    def serve(self):
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            sock = reuseport_socket(self.host, self.port)
+            server.serve(**dict(self.configuration, sock=sock))
+        except BaseException:
+            error_logger.exception('Worker %d failed', os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            self.serve()
+        self.children[pid] = monotonic()
+        return pid
+
+    def stop(self, signum, frame):
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Fails early if the address is invalid or in use: the socket is
+        # closed right away, the workers bind their own.
+        reuseport_socket(self.host, self.port).close()
+        self.warmup()
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info('Pre-forked %d workers on %s:%s',
+                    self.workers, self.host, self.port)
+
+        failures = 0
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or not self.running:
+                continue
+            if monotonic() - started < RESPAWN_DELAY:
+                failures += 1
+                if failures >= self.workers:
+                    error_logger.error(
+                        'Worker %d exited (code %d): all the workers '
+                        'died at startup, stopping.', pid, exit_code(status))
+                    self.stop(None, None)
+                    continue
+                # Avoid spinning on a worker dying at startup.
+                sleep(RESPAWN_DELAY)
+            else:
+                failures = 0
+            logger.warning('Worker %d exited (code %d), restarting.',
+                           pid, exit_code(status))
+            self.spawn()
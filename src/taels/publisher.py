@@ -4,17 +4,25 @@ import crom
 import dawnlight
 
 from copy import copy
+from inspect import isawaitable
+from time import perf_counter
 from crom.registry import Registry
 from dawnlight import ResolveError
 from dawnlight.interfaces import IConsumer
 from grokker import validator, ArgsDirective
 from sanic.request import Request
 from sanic.response import BaseHTTPResponse as Response
-from urllib.parse import unquote
-from zope.interface import Interface
-from zope.location import ILocation, LocationProxy, locate
-from .directives import traversable
-from .interfaces import IResponseFactory, ITraverser, IView
+from zope.interface import Interface, providedBy
+from .body import BodyStream
+from .cache import LRUCache, TraversalCache
+from .deadline import deadline_of
+from .directives import streaming, traversable
+from .executors import call
+from .instrumentation import instrumentation_for
+from .lineage import lineage_of
+from .paths import PathCompiler, PathStack
+from .streaming import DEFAULT_CONTENT_TYPE, is_stream, stream_response
+from .interfaces import IPublishable, IResponseFactory, ITraverser, IView
 
 
 shortcuts = {
@@ -26,11 +34,62 @@ dawnlight_components = Registry()
 _marker = object()
 
 
+def applies(predicate):
+    """Decorates a consumer with a predicate telling, for a given class,
+    if the consumer can ever consume something on its instances.
+    Consumers are filtered once per class by the dispatch table.
+    """
+    def decorate(consumer):
+        consumer.applies = predicate
+        return consumer
+    return decorate
+
+
+class ConsumersDispatch:
+    """Per-class table of the consumers applying to the traversed objects.
+
+    The consumers are subscriptions looked up in `registry` for the
+    interfaces provided by the object. They are computed and filtered
+    once per concrete class (and provided interfaces), then reused until
+    the registry is modified.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.table = {}
+        self.generation = None
+
+    def __call__(self, obj):
+        generation = registry_generation(self.registry)
+        if generation != self.generation:
+            self.table.clear()
+            self.generation = generation
+        key = (obj.__class__, providedBy(obj))
+        consumers = self.table.get(key)
+        if consumers is None:
+            cls = obj.__class__
+            consumers = self.table[key] = tuple(
+                consumer for consumer in IConsumer.subscription(
+                    obj, lookup=self.registry, subscribe=False)
+                if getattr(consumer, 'applies', None) is None
+                or consumer.applies(cls))
+        return consumers
+
+    def clear(self):
+        """Must be called if classes are modified at runtime.
+        """
+        self.table.clear()
+
+
+consumers_for = ConsumersDispatch(dawnlight_components)
+
+
 @crom.subscription
 @crom.sources(Interface)
 @crom.target(IConsumer)
 @crom.order(1100)
 @crom.registry(dawnlight_components)
+@applies(lambda cls: bool(traversable.get(cls)))
 async def attribute_consumer(request, obj, stack):
     traversables_attrs = traversable.get(obj)
     if traversables_attrs:
@@ -48,16 +107,16 @@ async def attribute_consumer(request, obj, stack):
 @crom.target(IConsumer)
 @crom.order(1000)
 @crom.registry(dawnlight_components)
+@applies(lambda cls: hasattr(cls, '__getitem__'))
 async def item_consumer(request, obj, stack):
-    if hasattr(obj, '__getitem__'):
-        ns, name = stack[0]
-        if ns == dawnlight.DEFAULT:
-            try:
-                item = obj[name]
-                _ = stack.popleft()
-                return True, item, stack
-            except (KeyError, TypeError):
-                pass
+    ns, name = stack[0]
+    if ns == dawnlight.DEFAULT:
+        try:
+            item = obj[name]
+            _ = stack.popleft()
+            return True, item, stack
+        except (KeyError, TypeError):
+            pass
     return False, obj, stack
 
 
@@ -70,7 +129,7 @@ async def traverser_consumer(request, obj, stack):
     ns, name = stack[0]
     traverser = ITraverser(obj, request, name=ns, default=None)
     if traverser is not None:
-        item = traverser.traverse(ns, name)
+        item = await call(request, traverser, traverser.traverse, ns, name)
         if item is not None:
             _ = stack.popleft()
             return True, item, stack
@@ -79,13 +138,28 @@ async def traverser_consumer(request, obj, stack):
 
 async def model_lookup(request, obj, stack):
     unconsumed = copy(stack)  # using copy. py3.5+ can use stack.copy()
-    consumers = IConsumer.subscription(
-        obj, lookup=dawnlight_components, subscribe=False)
-    
+    instrumentation = instrumentation_for(request)
+    lineage = lineage_of(request)
+    lineage.start(obj)
+    deadline = deadline_of(request)
     while unconsumed:
-        for consumer in consumers:
-            found, obj, unconsumed = await consumer(request, obj, unconsumed)
+        deadline.check()
+        segment = unconsumed[0]
+        # Each traversed object gets its own consumers.
+        for consumer in consumers_for(obj):
+            if instrumentation is None:
+                found, obj, unconsumed = await consumer(
+                    request, obj, unconsumed)
+            else:
+                start = perf_counter()
+                found, obj, unconsumed = await consumer(
+                    request, obj, unconsumed)
+                if found:
+                    instrumentation.record(
+                        request, 'traversal.' + consumer.__name__,
+                        perf_counter() - start)
             if found:
+                lineage.append(obj, segment)
                 break
         else:
             # nothing could be consumed
@@ -93,6 +167,77 @@ async def model_lookup(request, obj, stack):
     return obj, unconsumed
 
 
+def cached_model_lookup(lookup, cache=None, predicates=None):
+    """Wraps a model lookup to memoize its results in a `TraversalCache`.
+    `predicates` is an optional callable returning a hashable value
+    computed from the request, when the traversal outcome depends on it
+    (e.g. the host or the principal). The cache is reachable as the
+    `cache` attribute of the returned lookup, for invalidation purposes.
+    """
+    if cache is None:
+        cache = TraversalCache()
+
+    async def lookup_model(request, obj, stack):
+        key = (id(obj), tuple(stack),
+               predicates(request) if predicates is not None else None)
+        cached = cache.lookup(obj, key)
+        if cached is not None:
+            model, crumbs, lineage = cached
+            lineage_of(request).restore(*lineage)
+            return model, PathStack(crumbs)
+        model, crumbs = await lookup(request, obj, stack)
+        cache.store(
+            obj, key, model, crumbs, lineage_of(request).snapshot())
+        return model, crumbs
+
+    lookup_model.cache = cache
+    return lookup_model
+
+
+def registry_generation(registry):
+    """Returns a token changing each time the given registry is modified.
+    """
+    adapters = getattr(registry, 'registry', registry)
+    return getattr(adapters, '_generation', None)
+
+
+def cached_view_lookup(factory_lookup, registry=None, cache=None):
+    """Builds a view lookup, for `view_lookup`, memoizing the view
+    factories found by `factory_lookup(request, obj, name)`.
+
+    The factories (called with the object and the request to get the
+    view) are cached per (provided interfaces of the object, provided
+    interfaces of the request, name), as are the negative results.
+    The cache is emptied when the components registry, defaulting to
+    the implicit crom registry, is modified.
+    """
+    if cache is None:
+        cache = LRUCache()
+
+    async def lookup(request, obj, name):
+        generation = registry_generation(
+            registry if registry is not None else crom.implicit.lookup)
+        if generation != lookup.generation:
+            cache.clear()
+            lookup.generation = generation
+
+        key = (providedBy(obj), providedBy(request), name)
+        factory = cache.get(key, _marker)
+        if factory is _marker:
+            factory = factory_lookup(request, obj, name)
+            if isawaitable(factory):
+                factory = await factory
+            cache.set(key, factory)
+
+        if factory is None:
+            return None
+        return factory(obj, request)
+
+    lookup.cache = cache
+    lookup.generation = None
+    return lookup
+
+
 def view_lookup(lookup):
     async def resolve_view(request, obj, stack):
         default_fallback = False
@@ -127,31 +272,91 @@ def view_lookup(lookup):
 
 class Publisher:
 
-    def __init__(self, model_lookup, view_lookup):
+    def __init__(self, model_lookup, view_lookup, response_cache=None,
+                 compile_path=None, security=None):
         self.model_lookup = model_lookup
         self.view_lookup = view_lookup
+        self.response_cache = response_cache
+        self.compile_path = compile_path or PathCompiler(shortcuts)
+        self.security = security
 
     async def publish(self, request, root):
-        path = unquote(request.path)
-        stack = dawnlight.parse_path(path, shortcuts)
+        stack = self.compile_path(request.path)
+        instrumentation = instrumentation_for(request)
+
+        if instrumentation is None:
+            model, crumbs = await self.model_lookup(request, root, stack)
+        else:
+            model, crumbs = await instrumentation.timed(
+                request, 'traversal',
+                self.model_lookup(request, root, stack))
 
-        model, crumbs = await self.model_lookup(request, root, stack)
         if isinstance(model, Response):
             # The found object can be returned safely.
+            if self.security is not None:
+                await self.security.check(request, request.lineage)
             return model
 
+        if self.response_cache is not None:
+            # Cached responses are served before any view is instantiated.
+            # Protected views are not cached: checking the lineage is enough.
+            cached = self.response_cache.lookup(request, model, crumbs)
+            if cached is not None:
+                if self.security is not None:
+                    await self.security.check(request, request.lineage)
+                return cached
+
+        deadline = deadline_of(request)
+        deadline.check()
         if IResponseFactory.providedBy(model):
-            return await model()
+            factory = component = model
+        elif IPublishable.providedBy(model):
+            factory = component = model.bind(request)
+        else:
+            # The model needs an renderer
+            if instrumentation is None:
+                component = await self.view_lookup(request, model, crumbs)
+            else:
+                component = await instrumentation.timed(
+                    request, 'view_lookup',
+                    self.view_lookup(request, model, crumbs))
 
-        # The model needs an renderer
-        component = await self.view_lookup(request, model, crumbs)
+            if component is None:
+                raise PublicationError('%r can not be rendered.' % model)
+
+            # This renderer needs to be resolved into an IResponse
+            factory = IResponseFactory(component)
+
+        if self.security is not None:
+            # The lineage and the view are checked in one batch.
+            objects = list(request.lineage)
+            if component is not model:
+                objects.append(component)
+            await self.security.check(request, objects)
+
+        if streaming.get(component):
+            component.body_stream = BodyStream(request)
+        elif getattr(request, 'stream', None) is not None:
+            # The server did not buffer the body: this view expects it.
+            request.body = await BodyStream(request).read()
+
+        rendering = deadline.run(call(request, component, factory))
+        if instrumentation is None:
+            response = await rendering
+        else:
+            response = await instrumentation.timed(
+                request, 'response_factory', rendering)
 
-        if component is None:
-            raise PublicationError('%r can not be rendered.' % model)
+        if is_stream(response):
+            # Chunks are flushed as soon as they are produced.
+            return stream_response(
+                response, content_type=getattr(
+                    factory, 'content_type', DEFAULT_CONTENT_TYPE))
 
-        # This renderer needs to be resolved into an IResponse
-        factory = IResponseFactory(component)
-        return await factory()
+        if self.response_cache is not None:
+            return self.response_cache.store(
+                request, model, crumbs, component, response)
+        return response
 
     async def __call__(self, request, root):
         try:
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Rendering pipeline of the views, their slots and layout.
+
+The slots of a view are `IRenderable` components (typically
+`IViewSlot`), updated and rendered concurrently. Their outputs are
+given to the view template as the `slots` mapping, then the rendered
+view is wrapped by the layout. The `update` and `render` methods of the
+views and slots declaring the `blocking` directive are offloaded.
+"""
+
+import asyncio
+
+from .directives import depends
+from .executors import call
+from .fragments import fragment_key
+from .utils import dotted_name, maybe_await
+
+
+def page_tags(view, slots):
+    """Returns the union of the tags the view and its slots depend on.
+    """
+    tags = set(depends.get(view) or ())
+    for slot in (slots or {}).values():
+        tags.update(depends.get(slot) or ())
+    return tags
+
+
+class RenderPipeline:
+    """Renders views with their slots and layout.
+
+    If a `cache` (a `taels.fragments.FragmentCache`) is given, the outputs
+    of the slots declaring the `fragment` directive are cached, as are
+    the whole pages when a `layout_key` is given to `render`.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    async def render_fragment(self, renderer):
+        key, tags = None, ()
+        if self.cache is not None:
+            key, tags = fragment_key(renderer)
+            if key is not None:
+                output = self.cache.get(key, tags)
+                if output is not None:
+                    return output
+
+        request = getattr(renderer, 'request', None)
+        await call(request, renderer, renderer.update)
+        output = await call(request, renderer, renderer.render)
+
+        if key is not None:
+            self.cache.set(key, output, tags)
+        return output
+
+    async def render_slots(self, slots):
+        """Renders the slots, a mapping of names to renderers, concurrently.
+        Returns a mapping of the names to the outputs.
+        """
+        if not slots:
+            return {}
+        names = list(slots)
+        outputs = await asyncio.gather(
+            *(self.render_fragment(slots[name]) for name in names))
+        return dict(zip(names, outputs))
+
+    async def render(self, view, template=None, layout=None, slots=None,
+                     layout_key=None, **namespace):
+        """Renders the view, using `template` (an `ITemplate`) if given,
+        its `render` method otherwise, then wraps it into the layout.
+
+        `layout_key` identifies the rendered page: the layout output, view
+        content included, is cached per (layout, view, `layout_key`) and
+        served without updating nor rendering anything. The page depends
+        on the tags of the view and of all its slots.
+        """
+        key, tags = None, ()
+        if self.cache is not None and layout is not None \
+                and layout_key is not None:
+            key = (dotted_name(layout.__class__),
+                   dotted_name(view.__class__), layout_key)
+            tags = page_tags(view, slots)
+            output = self.cache.get(key, tags)
+            if output is not None:
+                return output
+
+        request = getattr(view, 'request', None)
+        await call(request, view, view.update)
+        outputs = await self.render_slots(slots)
+
+        if template is not None:
+            content = template.render(view, slots=outputs, **namespace)
+        else:
+            content = await call(request, view, view.render)
+
+        if layout is None:
+            return content
+
+        output = await maybe_await(layout(content, view=view, slots=outputs))
+        if key is not None:
+            self.cache.set(key, output, tags)
+        return output
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from .deadline import Deadline
 from .interfaces import IRequest
+from .lineage import Lineage
 from sanic.request import Request as BaseRequest
 from zope.interface import implementer
 
@@ -11,10 +13,27 @@ class Request(BaseRequest):
         'app', 'headers', 'version', 'method', '_cookies', 'transport',
         'body', 'parsed_json', 'parsed_args', 'parsed_form', 'parsed_files',
         '_ip', '_parsed_url', 'uri_template', 'stream', '_remote_addr',
-        '_socket', '_port', 'security_policy', 'principal',
+        '_socket', '_port', 'security_policy', 'principal', 'urls',
+        'lineage', 'resources', 'deadline', 'sessions', 'loaded_session',
     )
 
     def __init__(self, *args, **kwargs):
         super(Request, self).__init__(*args, **kwargs)
         self.principal = None
         self.security_policy = None
+        self.urls = None
+        self.lineage = Lineage()
+        self.resources = None
+        self.deadline = Deadline()
+        self.sessions = None
+        self.loaded_session = None
+
+    @property
+    def session(self):
+        """The session, loaded on first access.
+        """
+        if self.loaded_session is None:
+            if self.sessions is None:
+                raise LookupError('Sessions are not enabled.')
+            self.loaded_session = self.sessions.load(self)
+        return self.loaded_session
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Pooled resources (database or HTTP connections...) of an application.
+
+The providers are declared on the application. Their pools are created
+by a `before_server_start` listener and closed by an `after_server_stop`
+listener. Requests acquire the resources lazily, through
+`request.resources`, and the application releases them once the
+response middlewares are run. The resources of a failed request are
+discarded rather than given back to their pools.
+"""
+
+import asyncio
+
+from taels_server.log import error_logger
+
+from .utils import maybe_await
+
+
+class ResourcePool:
+    """A bounded pool of resources, created by `create()` when needed
+    and closed by `close(resource)`. Both can be coroutine functions.
+    """
+
+    def __init__(self, create, close=None, size=10):
+        self.create = create
+        self.close_resource = close
+        self.size = size
+        self.idle = []
+        self.created = 0
+        self._slots = None
+
+    @property
+    def in_use(self):
+        return self.created - len(self.idle)
+
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        await self._slots.acquire()
+        try:
+            if self.idle:
+                return self.idle.pop()
+            resource = await maybe_await(self.create())
+            self.created += 1
+            return resource
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, resource, discard=False):
+        try:
+            if discard:
+                self.created -= 1
+                if self.close_resource is not None:
+                    await maybe_await(self.close_resource(resource))
+            else:
+                self.idle.append(resource)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        idle, self.idle = self.idle, []
+        self.created -= len(idle)
+        if self.close_resource is not None:
+            for resource in idle:
+                await maybe_await(self.close_resource(resource))
+
+
+class Resources:
+    """The resource providers of an application, and their pools.
+    """
+
+    def __init__(self):
+        self.providers = {}
+        self.pools = {}
+
+    def provide(self, name, create, close=None, size=10):
+        self.providers[name] = (create, close, size)
+
+    async def start(self, app, loop):
+        for name, (create, close, size) in self.providers.items():
+            self.pools[name] = ResourcePool(create, close=close, size=size)
+
+    async def stop(self, app, loop):
+        pools, self.pools = self.pools, {}
+        for pool in pools.values():
+            await pool.close()
+
+
+class RequestResources:
+    """The resources acquired by a request. Each resource is acquired
+    once per request, on first access. `failed` is set when the request
+    handling failed.
+    """
+    __slots__ = ('resources', 'acquired', 'failed')
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.acquired = {}
+        self.failed = False
+
+    async def get(self, name):
+        entry = self.acquired.get(name)
+        if entry is None:
+            pool = self.resources.pools.get(name)
+            if pool is None:
+                raise LookupError('Unknown resource %r.' % name)
+            # The pool is kept: the application pools can be replaced.
+            entry = self.acquired[name] = (pool, await pool.acquire())
+        return entry[1]
+
+    async def release(self, discard=None):
+        """Gives the resources back to their pools, or closes them
+        if `discard` is true (defaulting to `failed`).
+        """
+        if discard is None:
+            discard = self.failed
+        acquired, self.acquired = self.acquired, {}
+        for name, (pool, resource) in acquired.items():
+            try:
+                if self.resources.pools.get(name) is not pool:
+                    # The pool was closed meanwhile.
+                    if pool.close_resource is not None:
+                        await maybe_await(pool.close_resource(resource))
+                else:
+                    await pool.release(resource, discard=discard)
+            except Exception:
+                error_logger.exception(
+                    'Exception occurred while releasing the resource %r',
+                    name)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Route table for the endpoints not needing traversal.
+
+The application looks its route table up before running the request
+middlewares (hence the publisher). Paths are exact, like `/health`, or
+parameterized, like `/api/users/<id>`. The handlers are called with the
+request and the parameters as keyword arguments, and return a response.
+When no route matches, the request goes through the traversal.
+"""
+
+from inspect import isawaitable
+from urllib.parse import unquote
+
+
+def split(path):
+    return [segment for segment in path.split('/') if segment]
+
+
+class Node:
+    __slots__ = ('children', 'parameter', 'name', 'handler')
+
+    def __init__(self):
+        self.children = {}
+        self.parameter = None
+        self.name = None
+        self.handler = None
+
+
+class RouteTable:
+    """A tree of the paths segments. Static segments are matched before
+    parameters. Exact paths are also kept in a mapping, matched in O(1).
+    """
+
+    def __init__(self):
+        self.root = Node()
+        self.exact = {}
+
+    def add(self, path, handler):
+        segments = split(path)
+        node = self.root
+        static = True
+        for segment in segments:
+            if segment.startswith('<') and segment.endswith('>'):
+                static = False
+                name = segment[1:-1]
+                if node.parameter is None:
+                    node.parameter = Node()
+                    node.parameter.name = name
+                elif node.parameter.name != name:
+                    raise ValueError(
+                        'Conflicting parameters %r and %r in %r.' % (
+                            node.parameter.name, name, path))
+                node = node.parameter
+            else:
+                node = node.children.setdefault(segment, Node())
+        node.handler = handler
+        if static:
+            self.exact['/' + '/'.join(segments)] = handler
+
+    def route(self, path):
+        """Route decorator.
+        """
+        def register_route(handler):
+            self.add(path, handler)
+            return handler
+        return register_route
+
+    def match(self, path):
+        """Returns the (handler, parameters) of the path, or None.
+        """
+        handler = self.exact.get(path.rstrip('/') or '/')
+        if handler is not None:
+            return handler, {}
+        return self._match(self.root, split(path), 0, {})
+
+    def _match(self, node, segments, index, parameters):
+        if index == len(segments):
+            if node.handler is not None:
+                return node.handler, parameters
+            return None
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, parameters)
+            if found is not None:
+                return found
+        if node.parameter is not None:
+            found = self._match(
+                node.parameter, segments, index + 1,
+                dict(parameters, **{node.parameter.name: unquote(segment)}))
+            if found is not None:
+                return found
+        return None
+
+    async def dispatch(self, request):
+        """Calls the handler of the request path, if any, and returns its
+        response. Returns None if no route matches.
+        """
+        found = self.match(request.path)
+        if found is None:
+            return None
+        handler, parameters = found
+        response = handler(request, **parameters)
+        if isawaitable(response):
+            response = await response
+        return response
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Permission checks of the published objects.
+
+The objects and views declaring a permission, with the `permission`
+directive, are checked against the `security_policy` of the request
+(an `ISecurityPolicy`) for its `principal`. All the objects of the
+traversed lineage are checked in a single call to the policy. The
+request must record its lineage (see `taels.request.Request`).
+"""
+
+from taels_server.http.exceptions import HTTPException
+
+from .cache import LRUCache
+from .directives import permission
+
+
+class Forbidden(HTTPException):
+    status_code = 403
+
+
+def principal_key(principal):
+    """Returns the key under which the decisions of a principal are
+    cached: its `id` if any, the principal itself otherwise.
+    """
+    return getattr(principal, 'id', principal)
+
+
+class SecurityGuard:
+    """Checks the permissions on batches of objects, caching the decisions
+    per principal for `ttl` seconds.
+    """
+
+    def __init__(self, ttl=30, maxsize=10000):
+        self.decisions = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def check(self, request, objects):
+        """Raises `Forbidden` if a permission is not granted on one of
+        the objects. Undecided checks are sent to the policy at once.
+        """
+        policy = request.security_policy
+        if policy is None:
+            return
+
+        principal = request.principal
+        pid = principal_key(principal)
+        denied = None
+        pending = []
+        for obj in objects:
+            required = permission.get(obj)
+            if required is None:
+                continue
+            key = (pid, id(obj), required)
+            decision = self.decisions.get(key)
+            if decision is not None and decision[0] is obj:
+                if not decision[1] and denied is None:
+                    denied = (required, obj)
+            else:
+                pending.append((key, required, obj))
+
+        if pending:
+            granted = await policy.check(
+                principal, [(required, obj) for _, required, obj in pending])
+            for (key, required, obj), allowed in zip(pending, granted):
+                self.decisions.set(key, (obj, bool(allowed)))
+                if not allowed and denied is None:
+                    denied = (required, obj)
+
+        if denied is not None:
+            raise Forbidden(
+                'Permission %r is required on %r.' % denied)
+
+    def invalidate(self, principal=None):
+        """Forgets the decisions, for the given principal or everyone.
+        """
+        if principal is None:
+            return self.decisions.clear()
+        pid = principal_key(principal)
+        self.decisions.discard(lambda key: key[0] == pid)
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""Sessions, loaded lazily and saved only when modified.
+
+`Sessions` installs a request middleware making the session available
+as `request.session`: it is only loaded when first accessed. A response
+middleware saves the modified sessions and sets the session cookie.
+
+The backends are synchronous: they store in memory, in files or in the
+cookie itself (signed). The expired sessions are removed in batches, at
+most every `sweep_interval` seconds.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from time import time
+from zope.interface import implementer
+
+from .interfaces import ISession
+
+
+@implementer(ISession)
+class Session(MutableMapping):
+    """The session data, tracking its modifications.
+    Mutable values modified in place require a call to `touch`.
+    """
+
+    def __init__(self, token=None, data=None):
+        self.token = token
+        self.data = data if data is not None else {}
+        self.new = data is None
+        self.dirty = False
+        self.deleted = False
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.dirty = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.dirty = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def touch(self):
+        self.dirty = True
+
+    def invalidate(self):
+        """Deletes the session.
+        """
+        self.data.clear()
+        self.deleted = self.dirty = True
+
+
+class Backend:
+    """Base of the backends, sweeping the expired sessions in batches.
+    """
+
+    def __init__(self, ttl=3600, sweep_interval=60):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.next_sweep = time() + sweep_interval
+
+    def maybe_sweep(self):
+        now = time()
+        if now >= self.next_sweep:
+            self.next_sweep = now + self.sweep_interval
+            self.sweep(now)
+
+    def sweep(self, now):
+        pass
+
+    def load(self, token):
+        """Returns the data of the session, or None.
+        """
+        raise NotImplementedError
+
+    def save(self, token, data):
+        """Stores the data and returns the token to send to the client.
+        """
+        raise NotImplementedError
+
+    def delete(self, token):
+        pass
+
+
+def new_token():
+    return secrets.token_urlsafe(24)
+
+
+class MemoryBackend(Backend):
+    """In-process backend, bounded to `maxsize` sessions.
+    """
+
+    def __init__(self, maxsize=10000, **kwargs):
+        super().__init__(**kwargs)
+        self.maxsize = maxsize
+        self.sessions = OrderedDict()
+
+    def load(self, token):
+        entry = self.sessions.get(token)
+        if entry is None:
+            return None
+        data, expires = entry
+        if expires < time():
+            del self.sessions[token]
+            return None
+        self.sessions.move_to_end(token)
+        return dict(data)
+
+    def save(self, token, data):
+        self.maybe_sweep()
+        token = token or new_token()
+        self.sessions[token] = (dict(data), time() + self.ttl)
+        self.sessions.move_to_end(token)
+        while len(self.sessions) > self.maxsize:
+            self.sessions.popitem(last=False)
+        return token
+
+    def delete(self, token):
+        self.sessions.pop(token, None)
+
+    def sweep(self, now):
+        expired = [token for token, (_, expires) in self.sessions.items()
+                   if expires < now]
+        for token in expired:
+            del self.sessions[token]
+
+
+class FileBackend(Backend):
+    """Stores each session as a JSON file in `directory`. The files
+    modification time is used as the last access time.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, token):
+        # The token comes from the client: it must not be a path.
+        if not token or not token.replace('-', '').replace('_', '').isalnum():
+            return None
+        return os.path.join(self.directory, token)
+
+    def load(self, token):
+        path = self.path(token)
+        if path is None:
+            return None
+        try:
+            if os.stat(path).st_mtime + self.ttl < time():
+                return None
+            with open(path, encoding='utf-8') as fd:
+                return json.load(fd)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, token, data):
+        self.maybe_sweep()
+        path = self.path(token)
+        if path is None:
+            token = new_token()
+            path = self.path(token)
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary, 'w', encoding='utf-8') as fd:
+            json.dump(data, fd)
+        os.replace(temporary, path)
+        return token
+
+    def delete(self, token):
+        path = self.path(token)
+        if path is not None:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def sweep(self, now):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime + self.ttl < now:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+
+
+class CookieBackend(Backend):
+    """Stores the session data in the cookie itself, signed with `secret`.
+    The data must be JSON serializable and fit in a cookie.
+    """
+
+    def __init__(self, secret, **kwargs):
+        super().__init__(**kwargs)
+        self.secret = secret.encode('utf-8') if isinstance(
+            secret, str) else secret
+
+    def sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).hexdigest()
+
+    def load(self, token):
+        if not token:
+            return None
+        payload, _, signature = token.rpartition('.')
+        payload = payload.encode('ascii', 'ignore')
+        # The signature comes from the client: compared as bytes, as the
+        # strings comparison fails on non-ASCII characters.
+        if not hmac.compare_digest(self.sign(payload).encode('ascii'),
+                                   signature.encode('utf-8', 'replace')):
+            return None
+        try:
+            issued, data = json.loads(base64.urlsafe_b64decode(payload))
+        except ValueError:
+            return None
+        if issued + self.ttl < time():
+            return None
+        return data
+
+    def save(self, token, data):
+        payload = base64.urlsafe_b64encode(
+            json.dumps([int(time()), data]).encode('utf-8'))
+        return '%s.%s' % (payload.decode('ascii'), self.sign(payload))
+
+
+class Sessions:
+    """Session support of an application, given a backend.
+    """
+
+    def __init__(self, backend, cookie_name='session', path='/',
+                 secure=False, httponly=True):
+        self.backend = backend
+        self.cookie_name = cookie_name
+        self.path = path
+        self.secure = secure
+        self.httponly = httponly
+
+    def install(self, app, order=None):
+        app.add_middleware('request', self.on_request, order=order)
+        app.add_middleware('response', self.on_response, order=order)
+
+    def on_request(self, request):
+        # Nothing is loaded until `request.session` is accessed.
+        request.sessions = self
+        return None
+
+    def load(self, request):
+        token = request.cookies.get(self.cookie_name)
+        data = self.backend.load(token) if token else None
+        return Session(token if data is not None else None, data)
+
+    def on_response(self, request, response):
+        session = request.loaded_session
+        if session is None or not session.dirty:
+            return None
+
+        cookie = self.cookie_name
+        if session.deleted:
+            if session.token is not None:
+                self.backend.delete(session.token)
+            response.cookies[cookie] = ''
+            response.cookies[cookie]['max-age'] = 0
+        else:
+            response.cookies[cookie] = self.backend.save(
+                session.token, session.data)
+            response.cookies[cookie]['max-age'] = self.backend.ttl
+            if self.httponly:
+                response.cookies[cookie]['httponly'] = True
+            if self.secure:
+                response.cookies[cookie]['secure'] = True
+        response.cookies[cookie]['path'] = self.path
+        return None
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Static files, published through the `++static++` namespace.
+
+The directories are declared on the application, with `Taels.static`:
+`app.static('assets', '/srv/assets')` publishes the files of this
+directory as `/++static++assets/...` below any traversed object, once
+this module is configured (it registers the `static` traverser).
+
+The traversed directories and files do not depend on the request: they
+can be cached by the traversal. The request headers are read when the
+response is built.
+
+Small files are kept in memory, reloaded when their modification time
+changes. Larger files are sent with `sendfile` when the transport allows
+it. Precompressed `.br` and `.gz` variants are served to the clients
+accepting them, and single byte ranges are honoured.
+"""
+
+import asyncio
+import crom
+import mimetypes
+import os
+
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from taels_server.http.response import HTTPResponse, StreamingHTTPResponse
+from zope.interface import Interface, implementer
+
+from .cache import LRUCache
+from .interfaces import IPublishable, IRequest, IResponseFactory, ITraverser
+
+
+CHUNK_SIZE = 64 * 1024
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class FileCache(LRUCache):
+    """Caches the content of the files smaller than `max_file_size`,
+    within `max_bytes`.
+    """
+
+    def __init__(self, max_file_size=256 * 1024, max_bytes=64 * 1024 * 1024):
+        super().__init__(maxsize=max_bytes, weigh=lambda entry: len(entry[1]))
+        self.max_file_size = max_file_size
+
+    def read(self, path, stat):
+        if stat.st_size > self.max_file_size:
+            return None
+        entry = self.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns:
+            return entry[1]
+        with open(path, 'rb') as fd:
+            data = fd.read()
+        self.set(path, (stat.st_mtime_ns, data))
+        return data
+
+
+files = FileCache()
+
+
+class SendfileResponse(StreamingHTTPResponse):
+    """Sends a range of a file, with `loop.sendfile` (zero-copy on plain
+    sockets), or by chunks if the transport does not support it.
+    """
+
+    def __init__(self, path, offset, count, status=200, headers=None,
+                 content_type='application/octet-stream'):
+        super().__init__(
+            None, status=status, headers=headers, content_type=content_type)
+        self.path = path
+        self.offset = offset
+        self.count = count
+
+    def head(self, version, keep_alive, keep_alive_timeout):
+        # The headers are serialized by the base class, with the cookies.
+        self.headers['Content-Length'] = str(self.count)
+        self.headers['Content-Type'] = self.headers.get(
+            'Content-Type', self.content_type)
+        self.headers['Connection'] = keep_alive and 'keep-alive' or 'close'
+        if keep_alive and keep_alive_timeout is not None:
+            self.headers['Keep-Alive'] = str(keep_alive_timeout)
+        return b'HTTP/%s %d %s\r\n%s\r\n' % (
+            version.encode('latin-1'), self.status,
+            HTTPStatus(self.status).phrase.encode('latin-1'),
+            self._parse_headers())
+
+    async def stream(self, version='1.1', keep_alive=False,
+                     keep_alive_timeout=None):
+        protocol = getattr(self, 'protocol', None)
+        transport = (protocol.transport if protocol is not None
+                     else self.transport)
+        transport.write(self.head(version, keep_alive, keep_alive_timeout))
+        with open(self.path, 'rb') as fd:
+            try:
+                await asyncio.get_event_loop().sendfile(
+                    transport, fd, self.offset, self.count)
+                return
+            except (AttributeError, NotImplementedError, RuntimeError):
+                # The loop or the transport can't send files.
+                pass
+            fd.seek(self.offset)
+            remaining = self.count
+            while remaining:
+                chunk = fd.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                transport.write(chunk)
+                if protocol is not None and hasattr(protocol, 'drain'):
+                    await protocol.drain()
+
+
+def byte_range(header, size):
+    """Returns the (start, end) of a single `bytes` range header value,
+    end excluded. Returns None if the header is not supported (it is then
+    ignored), raises ValueError if the range can't be satisfied.
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in ranges:
+        return None
+    first, _, last = ranges.strip().partition('-')
+    try:
+        if not first:
+            start, end = max(0, size - int(last)), size
+        else:
+            start = int(first)
+            end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start >= end:
+        raise ValueError('Unsatisfiable range %r.' % header)
+    return start, end
+
+
+@implementer(IPublishable)
+class StaticFile:
+
+    def __init__(self, path, cache=files):
+        self.path = path
+        self.cache = cache
+
+    def bind(self, request):
+        return StaticResponse(self, request)
+
+
+@implementer(IResponseFactory)
+class StaticResponse:
+    """Responds with a static file, given the headers of the request.
+    """
+
+    def __init__(self, file, request):
+        self.file = file
+        self.request = request
+
+    def variant(self):
+        """Returns the path and the encoding of the best precompressed
+        variant accepted by the client, or the file itself.
+        """
+        path = self.file.path
+        accepted = self.request.headers.get('Accept-Encoding', '')
+        for encoding, extension in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + extension):
+                return path + extension, encoding
+        return path, None
+
+    def not_modified(self, etag, mtime):
+        etags = self.request.headers.get('If-None-Match')
+        if etags is not None:
+            return etag in [value.strip() for value in etags.split(',')]
+        since = self.request.headers.get('If-Modified-Since')
+        if since is not None:
+            try:
+                return parsedate_to_datetime(since).timestamp() >= int(mtime)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def __call__(self):
+        path, encoding = self.variant()
+        stat = os.stat(path)
+        etag = '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Accept-Ranges': 'bytes',
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        content_type = (
+            mimetypes.guess_type(self.file.path)[0] or
+            'application/octet-stream')
+
+        if self.not_modified(etag, stat.st_mtime):
+            return HTTPResponse(status=304, headers=headers)
+
+        status, start, end = 200, 0, stat.st_size
+        header = self.request.headers.get('Range')
+        if header is not None:
+            try:
+                found = byte_range(header, stat.st_size)
+            except ValueError:
+                headers['Content-Range'] = 'bytes */%d' % stat.st_size
+                return HTTPResponse(status=416, headers=headers)
+            if found is not None:
+                status, (start, end) = 206, found
+                headers['Content-Range'] = 'bytes %d-%d/%d' % (
+                    start, end - 1, stat.st_size)
+
+        data = self.file.cache.read(path, stat)
+        if data is not None:
+            return HTTPResponse(
+                body_bytes=data[start:end], status=status, headers=headers,
+                content_type=content_type)
+        return SendfileResponse(
+            path, start, end - start, status=status, headers=headers,
+            content_type=content_type)
+
+
+class StaticDirectory:
+
+    def __init__(self, path):
+        self.path = path
+
+    def __getitem__(self, name):
+        if not name or name.startswith('.') or '/' in name or '\\' in name:
+            raise KeyError(name)
+        path = os.path.join(self.path, name)
+        if os.path.isdir(path):
+            return StaticDirectory(path)
+        if os.path.isfile(path):
+            return StaticFile(path)
+        raise KeyError(name)
+
+
+@crom.adapter
+@crom.sources(Interface, IRequest)
+@crom.target(ITraverser)
+@crom.name('static')
+@implementer(ITraverser)
+class StaticTraverser:
+    """Resolves `++static++name` to the static directory `name` of the
+    application.
+    """
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    def traverse(self, namespace, identifier):
+        directories = getattr(self.request.app, 'static_directories', {})
+        path = directories.get(identifier)
+        if path is None:
+            return None
+        return StaticDirectory(path)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Wrapping of chunk iterators into streaming responses.
+"""
+
+from collections.abc import AsyncIterator, Iterator
+from inspect import isawaitable
+from taels_server.http.response import StreamingHTTPResponse
+
+
+DEFAULT_CONTENT_TYPE = 'text/html; charset=utf-8'
+
+
+def is_stream(result):
+    """Tells if the result of a response factory is a stream of chunks:
+    an async iterator (such as an async generator) or an iterator.
+    """
+    return isinstance(result, (AsyncIterator, Iterator))
+
+
+async def write(response, chunk, encoding='utf-8'):
+    """Writes a chunk, waiting for the transport buffer to drain,
+    if the server supports it.
+    """
+    if isinstance(chunk, str):
+        chunk = chunk.encode(encoding)
+    if not chunk:
+        return
+    written = response.write(chunk)
+    if isawaitable(written):
+        # The server is in charge of the flow control.
+        await written
+    else:
+        drain = getattr(getattr(response, 'protocol', None), 'drain', None)
+        if drain is not None:
+            await drain()
+
+
+def stream_response(chunks, status=200, headers=None,
+                    content_type=DEFAULT_CONTENT_TYPE, encoding='utf-8'):
+    """Returns a streaming response sending the chunks as they come.
+    Text chunks are encoded using `encoding`.
+    """
+    async def streaming_fn(response):
+        if isinstance(chunks, AsyncIterator):
+            async for chunk in chunks:
+                await write(response, chunk, encoding)
+        else:
+            for chunk in chunks:
+                await write(response, chunk, encoding)
+
+    return StreamingHTTPResponse(
+        streaming_fn, status=status, headers=headers,
+        content_type=content_type)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""A minimal template engine, compiling templates to Python bytecode.
+
+Templates are text with `${expression}` substitutions, escaped for
+HTML, and `$!{expression}` substitutions, inserted as is. Expressions
+are Python expressions (without braces) evaluated in the namespace of
+the rendering: `view`, `context`, `request`, `slots`, `translate` and
+the extra keyword arguments.
+
+Each template is compiled once. A `TemplateLoader` can keep the
+compiled code on disk, so that the next start skips the compilation.
+"""
+
+import builtins
+import hashlib
+import marshal
+import os
+import re
+
+from html import escape
+from importlib.util import MAGIC_NUMBER
+from zope.interface import implementer
+
+from .interfaces import ITemplate
+
+
+SUBSTITUTION = re.compile(r'\$(!?)\{([^{}]*)\}')
+
+
+def text_of(value, quote=escape):
+    if value is None:
+        return ''
+    return quote(value if isinstance(value, str) else str(value))
+
+
+def raw_text_of(value):
+    return text_of(value, quote=lambda value: value)
+
+
+def translate_source(source):
+    """Returns the Python expression rendering the template source.
+    """
+    parts = []
+    position = 0
+    for match in SUBSTITUTION.finditer(source):
+        if match.start() > position:
+            parts.append(repr(source[position:match.start()]))
+        raw, expression = match.groups()
+        parts.append('%s((%s))' % (
+            '__raw' if raw else '__text', expression.strip()))
+        position = match.end()
+    if position < len(source):
+        parts.append(repr(source[position:]))
+    return "''.join((%s,))" % ', '.join(parts) if parts else "''"
+
+
+def compile_source(source, filename='<template>'):
+    return compile(translate_source(source), filename, 'eval')
+
+
+@implementer(ITemplate)
+class Template:
+    """A compiled template.
+    """
+    globals = {
+        '__builtins__': builtins,
+        '__text': text_of,
+        '__raw': raw_text_of,
+    }
+
+    def __init__(self, source=None, filename='<template>', code=None):
+        self.filename = filename
+        self.code = code if code is not None else compile_source(
+            source, filename)
+
+    def namespace(self, component, translate=None, **namespace):
+        namespace.setdefault('view', component)
+        namespace.setdefault('context', getattr(component, 'context', None))
+        namespace.setdefault('request', getattr(component, 'request', None))
+        namespace['translate'] = translate
+        return namespace
+
+    def render(self, component, translate=None, **namespace):
+        # The namespace is given as globals: comprehensions don't see the
+        # locals of the evaluated code.
+        return eval(self.code, dict(
+            self.globals, **self.namespace(component, translate, **namespace)))
+
+
+class TemplateLoader:
+    """Loads and compiles the templates of a directory, once.
+
+    If `cache_dir` is given, the compiled code is stored there, keyed by
+    the hash of the template source and the Python bytecode version.
+    """
+
+    def __init__(self, directory, cache_dir=None):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.templates = {}
+
+    def cache_path(self, source):
+        digest = hashlib.sha1(MAGIC_NUMBER + source.encode('utf-8'))
+        return os.path.join(self.cache_dir, digest.hexdigest() + '.bin')
+
+    def compile(self, source, filename):
+        if self.cache_dir is None:
+            return compile_source(source, filename)
+
+        path = self.cache_path(source)
+        try:
+            with open(path, 'rb') as fd:
+                return marshal.load(fd)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        code = compile_source(source, filename)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = '%s.%d' % (path, os.getpid())
+        with open(temporary, 'wb') as fd:
+            marshal.dump(code, fd)
+        os.replace(temporary, path)
+        return code
+
+    def get(self, name):
+        template = self.templates.get(name)
+        if template is None:
+            filename = os.path.join(self.directory, name)
+            with open(filename, encoding='utf-8') as fd:
+                source = fd.read()
+            template = self.templates[name] = Template(
+                filename=filename, code=self.compile(source, filename))
+        return template
+
+    __getitem__ = get
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Computation of the objects URLs.
+
+The URLs are resolved by climbing the lineage of the objects, using
+the request lineage recorded during the traversal first, then the
+`__parent__` and `__name__` attributes. Every resolved URL is
+memoized for the rest of the request, so the URLs of siblings cost a
+single concatenation.
+"""
+
+import crom
+import dawnlight
+
+from urllib.parse import quote
+from zope.interface import Interface, implementer
+from .interfaces import IPublicationRoot, IRequest, IURL
+from .lineage import lineage_of
+
+
+def segment_path(segment):
+    """Returns the path element of a (namespace, name) traversal segment.
+    """
+    ns, name = segment
+    if ns == dawnlight.DEFAULT:
+        return quote(name)
+    if ns == dawnlight.VIEW:
+        return '@@' + quote(name)
+    return '++%s++%s' % (ns, quote(name))
+
+
+class URLResolver:
+    """Memoizes the URLs of the objects, for the lifetime of a request.
+    Objects are indexed by identity; they are kept in the entries, as
+    their identity could otherwise be recycled.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.base = None
+        self.urls = {}
+
+    def root_url(self):
+        if self.base is None:
+            request = self.request
+            self.base = '%s://%s' % (request.scheme, request.host)
+        return self.base
+
+    def lineage(self, obj):
+        """Returns the (parent, path element) of `obj`.
+        """
+        traversed = lineage_of(self.request).locate(obj)
+        if traversed is not None:
+            parent, segment = traversed
+            return parent, segment_path(segment)
+
+        parent = getattr(obj, '__parent__', None)
+        if parent is None:
+            raise ValueError('%r has no parent.' % obj)
+        name = getattr(obj, '__name__', None)
+        if name is None:
+            raise ValueError('%r has no name.' % obj)
+        return parent, quote(name)
+
+    def __call__(self, obj):
+        root = lineage_of(self.request).root
+        chain = []
+        current = obj
+        while True:
+            known = self.urls.get(id(current))
+            if known is not None and known[0] is current:
+                url = known[1]
+                break
+            if current is root or IPublicationRoot.providedBy(current):
+                url = self.root_url()
+                self.urls[id(current)] = (current, url)
+                break
+            parent, element = self.lineage(current)
+            chain.append((current, element))
+            current = parent
+
+        for current, element in reversed(chain):
+            url = '%s/%s' % (url, element)
+            self.urls[id(current)] = (current, url)
+        return url
+
+
+def url_resolver(request):
+    """Returns the URL resolver of the request, creating it if needed.
+    Requests without an `urls` slot get a resolver per call.
+    """
+    resolver = getattr(request, 'urls', None)
+    if resolver is None:
+        resolver = URLResolver(request)
+        try:
+            request.urls = resolver
+        except AttributeError:
+            # The request class has no `urls` slot.
+            pass
+    return resolver
+
+
+@crom.adapter
+@crom.sources(Interface, IRequest)
+@crom.target(IURL)
+@implementer(IURL)
+class URL:
+    """The URL of an object, or of one of its views if `name` is given.
+    It is resolved when converted to a string.
+    """
+    __slots__ = ('context', 'request', 'name')
+
+    def __init__(self, context, request, name=None):
+        self.context = context
+        self.request = request
+        self.name = name
+
+    def __str__(self):
+        url = url_resolver(self.request)(self.context)
+        if self.name:
+            return '%s/%s' % (url, quote(self.name))
+        return url
+
+
+def url(request, obj, name=None):
+    """Returns the URL of the object, as a string.
+    """
+    return str(URL(obj, request, name=name))
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Small helpers shared by the modules of the package.
+"""
+
+from inspect import isawaitable, iscoroutinefunction
+
+
+async def maybe_await(result):
+    if isawaitable(result):
+        return await result
+    return result
+
+
+def is_coroutine(callable):
+    """Tells if calling `callable` always returns a coroutine: coroutine
+    functions and objects with an `async def __call__`.
+    """
+    return (iscoroutinefunction(callable) or
+            iscoroutinefunction(getattr(type(callable), '__call__', None)))
+
+
+def dotted_name(obj):
+    """Returns the `module:qualified.name` of a class or a function.
+    """
+    return '%s:%s' % (obj.__module__, obj.__qualname__)
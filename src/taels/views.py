@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Base views.
+"""
+
+import json
+
+from inspect import isawaitable
+from collections.abc import AsyncIterator
+from zope.interface import implementer
+from taels_server.http.response import HTTPResponse
+
+from .executors import call, offloading
+from .interfaces import IResponseFactory, IView
+from .streaming import is_stream, stream_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_dumps(data):
+    return json.dumps(
+        data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+if orjson is not None:
+    dumps = orjson.dumps
+else:
+    dumps = stdlib_dumps
+
+
+async def json_array(items, serializer=dumps):
+    """Yields the chunks of a JSON array of the items, an iterator or
+    an async iterator.
+    """
+    separator = b'['
+    if isinstance(items, AsyncIterator):
+        async for item in items:
+            yield separator + serializer(item)
+            separator = b','
+    else:
+        for item in items:
+            yield separator + serializer(item)
+            separator = b','
+    yield b']' if separator == b',' else b'[]'
+
+
+@implementer(IView, IResponseFactory)
+class JSONView:
+    """A view returning the JSON serialization of its `content`.
+
+    The content is serialized straight to bytes by `serializer`, using
+    orjson if it's installed, the json module otherwise. If `content`
+    returns an iterator (possibly async), it is streamed as a JSON array.
+    A synchronous `content` is offloaded if the view is `blocking`.
+    """
+    serializer = staticmethod(dumps)
+    content_type = 'application/json'
+    status = 200
+    headers = None
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    def update(self):
+        pass
+
+    def content(self):
+        raise NotImplementedError(
+            'JSON views must implement the `content` method.')
+
+    @offloading
+    async def __call__(self):
+        updated = self.update()
+        if isawaitable(updated):
+            await updated
+
+        data = await call(self.request, self, self.content)
+
+        if is_stream(data):
+            return stream_response(
+                json_array(data, self.serializer), status=self.status,
+                headers=self.headers, content_type=self.content_type)
+
+        return HTTPResponse(
+            body_bytes=self.serializer(data), status=self.status,
+            headers=self.headers, content_type=self.content_type)